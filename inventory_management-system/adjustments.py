@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+
+import csv
+from decimal import Decimal, InvalidOperation
+
+from database import execute_query, execute_transaction, get_current_store, get_products_by_ids
+from utils import clear_screen
+
+# rows shown in dry-run previews
+PREVIEW_ROWS = 10
+
+# delivery lines sent per multi-row INSERT into the temporary table
+DELIVERY_CHUNK_ROWS = 1000
+
+def _price_filter(name_filter=None, min_price=None, max_price=None):
+    """Build the WHERE clause selecting the products of a price adjustment"""
+    conditions = ["store_id = %s"]
+    params = [get_current_store()]
+    if name_filter:
+        conditions.append("name LIKE %s")
+        params.append(f"%{name_filter}%")
+    if min_price is not None:
+        conditions.append("price >= %s")
+        params.append(min_price)
+    if max_price is not None:
+        conditions.append("price <= %s")
+        params.append(max_price)
+    return " AND ".join(conditions), params
+
+def _new_price_expression(mode, amount):
+    """SQL expression for the adjusted price; never below zero"""
+    if mode == 'percent':
+        return "GREATEST(0, ROUND(price * (1 + %s / 100), 2))", [amount]
+    return "GREATEST(0, price + %s)", [amount]
+
+def preview_price_adjustment(mode, amount, name_filter=None, min_price=None, max_price=None):
+    """Return (matching product count, sample rows of id, name, old price, new price)"""
+    where, params = _price_filter(name_filter, min_price, max_price)
+    expression, expression_params = _new_price_expression(mode, amount)
+
+    count = execute_query(f"SELECT COUNT(*) FROM products WHERE {where}", tuple(params))
+    sample = execute_query(f"""
+        SELECT id, name, price, {expression} FROM products
+        WHERE {where}
+        ORDER BY name
+        LIMIT {PREVIEW_ROWS}
+    """, tuple(expression_params + params))
+    if count is None or sample is None:
+        return None
+    return count[0][0], sample
+
+def adjust_prices(mode, amount, name_filter=None, min_price=None, max_price=None):
+    """Change the price of every matching product with one UPDATE; return True on success"""
+    where, params = _price_filter(name_filter, min_price, max_price)
+    expression, expression_params = _new_price_expression(mode, amount)
+    result = execute_transaction([
+        (f"UPDATE products SET price = {expression} WHERE {where}",
+         tuple(expression_params + params))
+    ])
+    return result is not None
+
+def read_delivery_file(path):
+    """Read a delivery CSV with a product_id or sku column and a quantity column
+
+    Returns (key column, {product ID or SKU: total quantity}).
+    """
+    deliveries = {}
+    # SKUs compare case-insensitively in the database; lines that differ
+    # only in case are merged under the first spelling
+    spellings = {}
+    with open(path, newline='', encoding='utf-8') as delivery:
+        reader = csv.DictReader(delivery)
+        columns = reader.fieldnames or []
+        if 'quantity' not in columns or not ('product_id' in columns or 'sku' in columns):
+            raise ValueError("the file needs a 'quantity' column and a 'product_id' or 'sku' column")
+        key = 'product_id' if 'product_id' in columns else 'sku'
+
+        for line_number, row in enumerate(reader, start=2):
+            # short lines give None for the missing columns
+            reference = (row[key] or '').strip()
+            quantity = (row['quantity'] or '').strip()
+            if not reference or not quantity:
+                raise ValueError(f"line {line_number}: missing {key} or quantity")
+            try:
+                quantity = int(quantity)
+                if key == 'product_id':
+                    reference = int(reference)
+            except ValueError:
+                raise ValueError(f"line {line_number}: invalid {key} or quantity")
+            if quantity <= 0:
+                raise ValueError(f"line {line_number}: quantity must be greater than 0")
+            if key == 'sku':
+                reference = spellings.setdefault(reference.casefold(), reference)
+            deliveries[reference] = deliveries.get(reference, 0) + quantity
+    return key, deliveries
+
+def preview_restock(key, deliveries):
+    """Return {reference: (id, name, price, quantity)} for the delivery lines that match"""
+    if key == 'product_id':
+        return get_products_by_ids(deliveries)
+    skus = list(deliveries)
+    products = {}
+    for start in range(0, len(skus), DELIVERY_CHUNK_ROWS):
+        chunk = skus[start:start + DELIVERY_CHUNK_ROWS]
+        # the file's spelling is selected back, so a SKU that only matches
+        # under the column's case-insensitive collation is keyed like the
+        # delivery line, exactly as the restock UPDATE ... JOIN matches it
+        lines = " UNION ALL ".join(["SELECT %s AS reference"] * len(chunk))
+        result = execute_query(f"""
+            SELECT d.reference, p.id, p.name, p.price, p.quantity
+            FROM products p JOIN ({lines}) d ON p.sku = d.reference
+            WHERE p.store_id = %s
+        """, tuple(chunk) + (get_current_store(),))
+        if result is None:
+            return None
+        for reference, *product in result:
+            products[reference] = tuple(product)
+    return products
+
+def restock_from_delivery(key, deliveries):
+    """Add delivered quantities to stock with set-based statements in one transaction
+
+    The delivery lines are bulk-loaded into a temporary table; one UPDATE
+    joins it to products and one INSERT ... SELECT writes the ledger entries.
+    """
+    store_id = get_current_store()
+    statements = [(f"""
+        CREATE TEMPORARY TABLE delivery_lines (
+            reference {'INT' if key == 'product_id' else 'VARCHAR(64)'} PRIMARY KEY,
+            quantity INT NOT NULL
+        )
+    """, None)]
+
+    lines = list(deliveries.items())
+    for start in range(0, len(lines), DELIVERY_CHUNK_ROWS):
+        chunk = lines[start:start + DELIVERY_CHUNK_ROWS]
+        values = ", ".join(["(%s, %s)"] * len(chunk))
+        statements.append((f"INSERT INTO delivery_lines (reference, quantity) VALUES {values}",
+                           tuple(value for line in chunk for value in line)))
+
+    column = 'id' if key == 'product_id' else 'sku'
+    statements += [
+        (f"""
+            UPDATE products p JOIN delivery_lines d ON p.{column} = d.reference
+            SET p.quantity = p.quantity + d.quantity
+            WHERE p.store_id = %s
+        """, (store_id,)),
+        (f"""
+            INSERT INTO stock_movements (store_id, product_id, movement_type, quantity_change)
+            SELECT p.store_id, p.id, 'restock', d.quantity
+            FROM products p JOIN delivery_lines d ON p.{column} = d.reference
+            WHERE p.store_id = %s
+        """, (store_id,))
+    ]
+    return execute_transaction(statements) is not None
+
+def _bulk_price_changes():
+    print("\nPrice change type:")
+    print("1. Percentage (e.g. 5 for +5%, -10 for -10%)")
+    print("2. Fixed amount (e.g. 0.50 or -1.00)")
+    choice = input("Select option (1-2): ").strip()
+    if choice not in ('1', '2'):
+        print("Invalid option selected")
+        return
+    mode = 'percent' if choice == '1' else 'fixed'
+
+    try:
+        amount = Decimal(input("Change: ").strip())
+        name_filter = input("Only names containing (Enter for all): ").strip() or None
+        min_input = input("Minimum current price (Enter for no limit): ").strip()
+        min_price = Decimal(min_input) if min_input else None
+        max_input = input("Maximum current price (Enter for no limit): ").strip()
+        max_price = Decimal(max_input) if max_input else None
+    except InvalidOperation:
+        print("Invalid number format")
+        return
+
+    preview = preview_price_adjustment(mode, amount, name_filter, min_price, max_price)
+    if preview is None:
+        print("Could not preview the change. Please try again.")
+        return
+    count, sample = preview
+    if count == 0:
+        print("No products match these filters.")
+        return
+
+    print(f"\nDRY RUN: {count} product(s) will change. First {len(sample)}:")
+    print(f"{'ID':<5} {'Product Name':<25} {'Old Price':<12} {'New Price':<12}")
+    print("-" * 56)
+    for product_id, name, old_price, new_price in sample:
+        print(f"{product_id:<5} {name[:24]:<25} ${old_price:<11.2f} ${new_price:<11.2f}")
+
+    confirm = input(f"\nApply this change to {count} product(s)? (y/N): ").lower().strip()
+    if confirm != 'y':
+        print("Price change cancelled.")
+        return
+    if adjust_prices(mode, amount, name_filter, min_price, max_price):
+        print(f"Prices of {count} product(s) updated.")
+    else:
+        print("Failed to update prices. No changes were made.")
+
+def _bulk_restock():
+    path = input("\nDelivery file (CSV with product_id or sku, and quantity): ").strip()
+    try:
+        key, deliveries = read_delivery_file(path)
+    except OSError as e:
+        print(f"Could not read delivery file: {e}")
+        return
+    except ValueError as e:
+        print(f"Invalid delivery file: {e}")
+        return
+    if not deliveries:
+        print("The delivery file has no lines.")
+        return
+
+    products = preview_restock(key, deliveries)
+    if products is None:
+        print("Could not preview the delivery. Please try again.")
+        return
+    unknown = [reference for reference in deliveries if reference not in products]
+
+    print(f"\nDRY RUN: {len(products)} product(s) will be restocked "
+          f"({sum(deliveries[reference] for reference in products)} units).")
+    print(f"{'Ref':<15} {'Product Name':<25} {'Stock':<8} {'New Stock':<10}")
+    print("-" * 60)
+    for reference in list(products)[:PREVIEW_ROWS]:
+        _, name, _, quantity = products[reference]
+        print(f"{str(reference)[:14]:<15} {name[:24]:<25} {quantity:<8} {quantity + deliveries[reference]:<10}")
+    if unknown:
+        print(f"\nWarning: {len(unknown)} line(s) match no product and will be skipped: "
+              f"{', '.join(map(str, unknown[:PREVIEW_ROWS]))}")
+
+    if not products:
+        return
+    confirm = input("\nApply this delivery? (y/N): ").lower().strip()
+    if confirm != 'y':
+        print("Restock cancelled.")
+        return
+    if restock_from_delivery(key, deliveries):
+        print(f"Stock of {len(products)} product(s) updated.")
+    else:
+        print("Failed to apply the delivery. No changes were made.")
+
+def bulk_adjustments():
+    """Bulk price changes and restocking from a delivery file"""
+    clear_screen()
+    print("="*60)
+    print("                  BULK ADJUSTMENTS")
+    print("="*60)
+    print("1. Change Prices")
+    print("2. Restock From Delivery File")
+    print("3. Cancel")
+    choice = input("Select option (1-3): ").strip()
+
+    if choice == '1':
+        _bulk_price_changes()
+    elif choice == '2':
+        _bulk_restock()
+    elif choice == '3':
+        print("Cancelled")
+    else:
+        print("Invalid option selected")
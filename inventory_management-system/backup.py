@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+
+import argparse
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+
+from database import SHARD_CONFIGS, get_read_connection, get_shard_connection, iter_query, upgrade_schema
+from report_cache import clear_report_cache
+from utils import clear_screen
+from mysql.connector import Error
+
+# backups are kept in one sub-directory per shard
+BACKUP_DIR = 'backups'
+
+# rows per compressed chunk file (and per bulk insert on restore)
+BACKUP_CHUNK_ROWS = 20000
+
+# A transaction open this long when a backup starts may still commit rows
+# below that backup's marks (IDs and timestamps are taken when a row is
+# written, not when it commits), so the next backup reads this far back again
+BACKUP_LATE_COMMIT_MINUTES = 15
+
+# Tables in restore order. 'append' tables only ever get new rows and are
+# backed up above the mark of the previous backup: the highest key among
+# rows written (per 'date') before the late-commit window. 'modified' tables
+# are backed up by their updated_at modification marker, from the start of
+# the previous backup's window.
+BACKUP_TABLES = [
+    ('products', {
+        'mode': 'modified',
+        'key': 'updated_at',
+        'columns': ['id', 'store_id', 'name', 'price', 'quantity', 'sku',
+                    'created_date', 'updated_at']
+    }),
+    ('sales', {
+        'mode': 'append',
+        'key': 'id',
+        'date': 'sale_date',
+        # total_amount is a generated column and is not backed up
+        'columns': ['id', 'store_id', 'product_id', 'quantity_sold', 'sale_price', 'sale_date']
+    }),
+    ('stock_movements', {
+        'mode': 'append',
+        'key': 'id',
+        'date': 'movement_date',
+        'columns': ['id', 'store_id', 'product_id', 'movement_type', 'quantity_change',
+                    'sale_id', 'movement_date']
+    }),
+    ('stock_snapshots', {
+        'mode': 'append',
+        'key': 'id',
+        'date': 'snapshot_date',
+        'columns': ['id', 'store_id', 'last_movement_id', 'snapshot_date']
+    }),
+    ('stock_snapshot_items', {
+        'mode': 'append',
+        'key': 'snapshot_id',
+        # items are written in the same transaction as their snapshot, so
+        # they are settled exactly when the snapshot is
+        'follows': 'stock_snapshots',
+        'columns': ['snapshot_id', 'product_id', 'quantity', 'unit_price']
+    })
+]
+
+# columns of backups taken before the manifest recorded them
+LEGACY_BACKUP_COLUMNS = {
+    'sales': ['id', 'store_id', 'product_id', 'product_name', 'quantity_sold',
+              'sale_price', 'total_amount', 'sale_date']
+}
+
+def _shard_dir(shard, backup_dir):
+    return os.path.join(backup_dir, shard)
+
+def _load_manifest(shard, backup_dir=BACKUP_DIR):
+    """Return the list of backups taken of a shard, oldest first"""
+    path = os.path.join(_shard_dir(shard, backup_dir), 'manifest.json')
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as manifest:
+        return json.load(manifest)['backups']
+
+def _save_manifest(shard, backups, backup_dir=BACKUP_DIR):
+    path = os.path.join(_shard_dir(shard, backup_dir), 'manifest.json')
+    # write then rename, so a crash never leaves a half-written manifest
+    with open(path + '.tmp', 'w', encoding='utf-8') as manifest:
+        json.dump({'backups': backups}, manifest, indent=2)
+    os.replace(path + '.tmp', path)
+
+def _dump_query(connection, query, params, directory, prefix, settle=None):
+    """Stream a query into gzip-compressed JSONL chunk files
+
+    settle is (key index, date index, cutoff). Returns (files, rows,
+    highest key among rows dated before cutoff). The marks of the next
+    incremental backup come from the rows actually written, so a replica
+    that lags behind can never leave a gap.
+    """
+    files = []
+    rows = 0
+    settled = None
+    for chunk in iter_query(query, params, BACKUP_CHUNK_ROWS, connection=connection):
+        name = f"{prefix}_{len(files) + 1:05d}.jsonl.gz"
+        with gzip.open(os.path.join(directory, name), 'wt', encoding='utf-8') as output:
+            output.writelines(json.dumps(row, default=str) + "\n" for row in chunk)
+        files.append(name)
+        rows += len(chunk)
+        if settle is not None:
+            key_index, date_index, cutoff = settle
+            keys = [row[key_index] for row in chunk if row[date_index] < cutoff]
+            if keys:
+                settled = max(keys) if settled is None else max(settled, max(keys))
+    return files, rows, settled
+
+def backup_shard(shard, full=False, backup_dir=BACKUP_DIR):
+    """Back up one shard: a full baseline, or only what changed since the last backup"""
+    backups = _load_manifest(shard, backup_dir)
+    previous = backups[-1] if backups and not full else None
+    backup_type = 'incremental' if previous else 'full'
+    backup_id = backups[-1]['id'] + 1 if backups else 1
+
+    started = time.perf_counter()
+    directory_name = f"{backup_id:05d}_{backup_type}"
+    directory = os.path.join(_shard_dir(shard, backup_dir), directory_name)
+    os.makedirs(directory, exist_ok=True)
+
+    entry = {
+        'id': backup_id,
+        'type': backup_type,
+        'taken_at': datetime.now().isoformat(timespec='seconds'),
+        'directory': directory_name,
+        'marks': {},
+        'columns': {table: spec['columns'] for table, spec in BACKUP_TABLES},
+        'files': {},
+        'rows': {}
+    }
+
+    connection = get_read_connection(shard=shard)
+    if not connection:
+        print(f"Could not connect to shard '{shard}'")
+        return None
+
+    try:
+        # every table is read on this one connection from the same snapshot,
+        # so a backup never holds a sale without its product, or snapshot
+        # items without their snapshot
+        connection.start_transaction(consistent_snapshot=True,
+                                     isolation_level='REPEATABLE READ', readonly=True)
+        cursor = connection.cursor()
+        cursor.execute("SELECT NOW() - INTERVAL %s MINUTE", (BACKUP_LATE_COMMIT_MINUTES,))
+        cutoff = cursor.fetchone()[0]
+        cursor.close()
+
+        for table, spec in BACKUP_TABLES:
+            query = f"SELECT {', '.join(spec['columns'])} FROM {table}"
+            params = ()
+            low = previous['marks'][table] if previous else None
+            if spec['mode'] == 'append':
+                query += f" WHERE {spec['key']} > %s ORDER BY {spec['key']}"
+                params = (low or 0,)
+            elif low is not None:
+                # >= so rows changed within the same second as the mark are kept
+                query += f" WHERE {spec['key']} >= %s ORDER BY id"
+                params = (low,)
+            else:
+                query += " ORDER BY id"
+
+            settle = None
+            if 'date' in spec:
+                settle = (spec['columns'].index(spec['key']),
+                          spec['columns'].index(spec['date']), cutoff)
+            files, rows, settled = _dump_query(connection, query, params, directory, table, settle)
+
+            # rows above the mark are read again by the next backup; restore
+            # skips the ones it already has
+            if spec['mode'] == 'modified':
+                entry['marks'][table] = str(cutoff)
+            elif 'follows' in spec:
+                entry['marks'][table] = entry['marks'][spec['follows']]
+            elif settled is None or (low is not None and low > settled):
+                entry['marks'][table] = low
+            else:
+                entry['marks'][table] = settled
+            entry['files'][table] = files
+            entry['rows'][table] = rows
+            print(f"  {table}: {rows:,} rows")
+
+        if previous:
+            # the full list of product IDs lets restore replay deletions
+            files, _, _ = _dump_query(connection, "SELECT id FROM products ORDER BY id", (),
+                                      directory, 'product_ids')
+            entry['files']['product_ids'] = files
+
+    except Error as e:
+        print(f"Database error during backup: {e}")
+        return None
+    except OSError as e:
+        print(f"Could not write backup files: {e}")
+        return None
+    finally:
+        try:
+            connection.rollback()
+        except Error:
+            pass
+        connection.close()
+
+    backups.append(entry)
+    _save_manifest(shard, backups, backup_dir)
+    print(f"{backup_type.capitalize()} backup #{backup_id} of shard '{shard}' "
+          f"finished in {time.perf_counter() - started:.1f}s")
+    return backup_id
+
+def backup_all(full=False, backup_dir=BACKUP_DIR):
+    """Back up every shard; returns True if all succeeded"""
+    ok = True
+    for shard in SHARD_CONFIGS:
+        print(f"Backing up shard '{shard}'...")
+        if backup_shard(shard, full, backup_dir) is None:
+            ok = False
+    return ok
+
+def _read_chunk(directory, name):
+    with gzip.open(os.path.join(directory, name), 'rt', encoding='utf-8') as chunk:
+        return [json.loads(line) for line in chunk]
+
+def _backup_columns(backup, table, spec):
+    """Return the columns a backup holds for a table, in file order"""
+    if 'columns' in backup:
+        return backup['columns'][table]
+    return LEGACY_BACKUP_COLUMNS.get(table, spec['columns'])
+
+def _insert_query(table, columns):
+    placeholders = ", ".join(["%s"] * len(columns))
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    if table == 'products':
+        # products are backed up again whenever they change: upsert them
+        query += " ON DUPLICATE KEY UPDATE " + ", ".join(
+            f"{column} = VALUES({column})" for column in columns if column != 'id')
+    else:
+        # the late-commit window repeats rows of the previous backup
+        query += f" ON DUPLICATE KEY UPDATE {columns[0]} = {columns[0]}"
+    return query
+
+def _restore_chain(backups, until=None):
+    """Return the backups to replay: the latest full one and the incrementals after it"""
+    if until is not None:
+        backups = [backup for backup in backups if backup['id'] <= until]
+    fulls = [index for index, backup in enumerate(backups) if backup['type'] == 'full']
+    return backups[fulls[-1]:] if fulls else []
+
+def restore_shard(shard, backup_dir=BACKUP_DIR, until=None):
+    """Restore a shard into empty tables by replaying its backup chain"""
+    chain = _restore_chain(_load_manifest(shard, backup_dir), until)
+    if not chain:
+        print(f"No full backup found for shard '{shard}'.")
+        return False
+
+    # creates any missing tables, without the sample data of a first setup
+    if not upgrade_schema([shard]):
+        return False
+
+    connection = get_shard_connection(shard)
+    if not connection:
+        return False
+
+    started = time.perf_counter()
+    try:
+        cursor = connection.cursor()
+        for table, _ in BACKUP_TABLES:
+            cursor.execute(f"SELECT 1 FROM {table} LIMIT 1")
+            if cursor.fetchall():
+                print(f"Table '{table}' on shard '{shard}' is not empty. "
+                      "Restore only into a freshly created database.")
+                return False
+
+        for backup in chain:
+            print(f"Replaying {backup['type']} backup #{backup['id']} ({backup['taken_at']})...")
+            directory = os.path.join(_shard_dir(shard, backup_dir), backup['directory'])
+
+            # Deletions are replayed first, while foreign key checks are on
+            # so their sales cascade. The product upsert below then only
+            # meets rows that still exist; a product deleted and re-added
+            # under the same name or SKU cannot hit the old row's unique key.
+            if 'product_ids' in backup['files']:
+                kept = set()
+                for name in backup['files']['product_ids']:
+                    kept.update(row[0] for row in _read_chunk(directory, name))
+                cursor.execute("SELECT id FROM products")
+                removed = [row[0] for row in cursor.fetchall() if row[0] not in kept]
+                for start in range(0, len(removed), BACKUP_CHUNK_ROWS):
+                    chunk = removed[start:start + BACKUP_CHUNK_ROWS]
+                    cursor.execute(f"DELETE FROM products WHERE id IN ({', '.join(['%s'] * len(chunk))})",
+                                   tuple(chunk))
+                connection.commit()
+
+            # each backup is a consistent snapshot; foreign key checks are
+            # still switched off while loading it, so rows of a backup that
+            # is not (one taken by an earlier version) cannot block the restore
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+            for table, spec in BACKUP_TABLES:
+                insert_query = _insert_query(table, spec['columns'])
+                # backups of an older layout are mapped onto the current columns
+                stored = _backup_columns(backup, table, spec)
+                positions = [stored.index(column) for column in spec['columns']]
+                for name in backup['files'][table]:
+                    rows = _read_chunk(directory, name)
+                    if stored != spec['columns']:
+                        rows = [[row[position] for position in positions] for row in rows]
+                    cursor.executemany(insert_query, rows)
+                    connection.commit()
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+        cursor.close()
+    except Error as e:
+        print(f"Database error during restore: {e}")
+        return False
+    except OSError as e:
+        print(f"Could not read backup files: {e}")
+        return False
+    finally:
+        connection.close()
+
+    clear_report_cache()
+    print(f"Restored shard '{shard}' from {len(chain)} backup(s) "
+          f"in {time.perf_counter() - started:.1f}s")
+    return True
+
+def backup_menu():
+    """Take backups or restore a shard from them"""
+    clear_screen()
+    print("="*60)
+    print("                  BACKUP & RESTORE")
+    print("="*60)
+
+    for shard in SHARD_CONFIGS:
+        backups = _load_manifest(shard)
+        if backups:
+            last = backups[-1]
+            print(f"Shard '{shard}': {len(backups)} backup(s), last {last['type']} #{last['id']} at {last['taken_at']}")
+        else:
+            print(f"Shard '{shard}': no backups yet")
+    print("-" * 60)
+
+    print("1. Backup (incremental; full if there is none yet)")
+    print("2. Full Backup")
+    print("3. Restore")
+    print("4. Cancel")
+    choice = input("Select option (1-4): ").strip()
+
+    if choice == '1':
+        backup_all()
+    elif choice == '2':
+        backup_all(full=True)
+    elif choice == '3':
+        shard = input(f"Shard to restore ({', '.join(SHARD_CONFIGS)}): ").strip()
+        if shard not in SHARD_CONFIGS:
+            print("Unknown shard.")
+            return
+        until_input = input("Restore up to backup # (Enter for latest): ").strip()
+        try:
+            until = int(until_input) if until_input else None
+        except ValueError:
+            print("Please enter a valid backup number.")
+            return
+        restore_shard(shard, until=until)
+    elif choice == '4':
+        print("Cancelled")
+    else:
+        print("Invalid option selected")
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up and restore the SmallBiz inventory database")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    backup_parser = subparsers.add_parser('backup', help="back up every shard")
+    backup_parser.add_argument('--full', action='store_true', help="take a new full baseline")
+    backup_parser.add_argument('--dir', default=BACKUP_DIR)
+    restore_parser = subparsers.add_parser('restore', help="restore one shard into empty tables")
+    restore_parser.add_argument('--shard', choices=sorted(SHARD_CONFIGS), required=True)
+    restore_parser.add_argument('--until', type=int, help="last backup number to replay")
+    restore_parser.add_argument('--dir', default=BACKUP_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'backup':
+        return 0 if backup_all(args.full, args.dir) else 1
+    return 0 if restore_shard(args.shard, args.dir, args.until) else 1
+
+# Run backups from the command line, e.g. from a nightly scheduled job
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+from database import execute_query, get_current_store, get_product_by_id
+from sales import commit_sale
+from utils import clear_screen
+
+# in-memory SKU maps per store, kept warm between checkout sessions
+_sku_indexes = {}
+_sku_indexes_lock = threading.Lock()
+
+# a map older than this is refreshed before the next scan, so price and
+# stock changes made elsewhere (e.g. Bulk Adjustments) are picked up
+SKU_INDEX_MAX_AGE_SECONDS = 5
+
+def _new_sku_index():
+    return {'by_sku': {}, 'sku_by_id': {}, 'mark': None, 'refreshed_at': None}
+
+def _unmap_product(index, product_id):
+    """Remove a product's SKU entry, unless the SKU already moved to another product"""
+    old_sku = index['sku_by_id'].pop(product_id, None)
+    entry = index['by_sku'].get(old_sku)
+    if entry and entry[0] == product_id:
+        del index['by_sku'][old_sku]
+
+def refresh_sku_index(store_id=None):
+    """Load products changed since the last refresh into a store's SKU map
+
+    The first call loads every product with a SKU; later calls only fetch
+    rows whose updated_at moved on, so keeping the map warm is cheap.
+    """
+    if store_id is None:
+        store_id = get_current_store()
+
+    with _sku_indexes_lock:
+        index = _sku_indexes.setdefault(store_id, _new_sku_index())
+        query = "SELECT id, sku, name, price, quantity, updated_at FROM products WHERE store_id = %s"
+        params = (store_id,)
+        if index['mark'] is None:
+            query += " AND sku IS NOT NULL"
+        else:
+            # >= so rows changed within the same second as the mark are not missed;
+            # rows without a SKU are included so a removed SKU is unmapped
+            query += " AND updated_at >= %s"
+            params += (index['mark'],)
+        refreshed_at = time.monotonic()
+
+        rows = execute_query(query, params)
+        if rows is None:
+            return False
+
+        for product_id, sku, name, price, quantity, updated_at in rows:
+            _unmap_product(index, product_id)
+            if sku:
+                index['by_sku'][sku] = [product_id, name, price, quantity]
+                index['sku_by_id'][product_id] = sku
+            if index['mark'] is None or updated_at > index['mark']:
+                index['mark'] = updated_at
+        index['refreshed_at'] = refreshed_at
+        return True
+
+def refresh_sku_index_if_stale(store_id=None):
+    """Refresh a store's SKU map if it is older than SKU_INDEX_MAX_AGE_SECONDS"""
+    if store_id is None:
+        store_id = get_current_store()
+    index = _sku_indexes.get(store_id)
+    if (index and index['refreshed_at'] is not None
+            and time.monotonic() - index['refreshed_at'] < SKU_INDEX_MAX_AGE_SECONDS):
+        return True
+    return refresh_sku_index(store_id)
+
+def forget_product(product_id, store_id=None):
+    """Drop a product from the SKU map, e.g. after it was deleted"""
+    if store_id is None:
+        store_id = get_current_store()
+    with _sku_indexes_lock:
+        index = _sku_indexes.get(store_id)
+        if index:
+            _unmap_product(index, product_id)
+
+def lookup_sku(sku, store_id=None):
+    """Return [id, name, price, quantity] for a SKU from the in-memory map"""
+    if store_id is None:
+        store_id = get_current_store()
+    index = _sku_indexes.get(store_id)
+    return index['by_sku'].get(sku) if index else None
+
+def _parse_scan(scan):
+    """Split scanner input into (quantity, sku); '3*SKU' sells three"""
+    if '*' in scan:
+        quantity, sku = scan.split('*', 1)
+        return int(quantity), sku.strip()
+    return 1, scan
+
+def rapid_checkout():
+    """Continuous checkout: every scanned SKU is sold immediately"""
+    clear_screen()
+    print("="*60)
+    print("                    RAPID CHECKOUT")
+    print("="*60)
+
+    if not refresh_sku_index():
+        print("Could not load products. Please try again.")
+        return
+
+    print("Scan or type a SKU to sell one item, or QTY*SKU (e.g. 3*12345).")
+    print("Press Enter on an empty line to finish.")
+    print("-" * 60)
+
+    items_sold = 0
+    session_total = 0
+
+    while True:
+        scan = input("Scan: ").strip()
+        if not scan:
+            break
+
+        try:
+            quantity, sku = _parse_scan(scan)
+        except ValueError:
+            print("  Invalid quantity. Use QTY*SKU, e.g. 3*12345.")
+            continue
+        if quantity <= 0:
+            print("  Quantity must be greater than 0.")
+            continue
+
+        refresh_sku_index_if_stale()
+        product = lookup_sku(sku)
+        if not product:
+            # maybe added since the map was loaded: one incremental refresh
+            refresh_sku_index()
+            product = lookup_sku(sku)
+        if not product:
+            print(f"  Unknown SKU '{sku}'.")
+            continue
+
+        if quantity > product[3]:
+            # the map may be behind a restock made elsewhere
+            refresh_sku_index()
+            product = lookup_sku(sku) or product
+
+        product_id, name, price, stock = product
+        if quantity > stock:
+            print(f"  Not enough stock for {name}. Available: {stock}")
+            continue
+
+        sale_id = commit_sale(product_id, quantity, price)
+        if not sale_id:
+            print(f"  Could not sell {name}; stock may have changed. Please scan again.")
+            current = get_product_by_id(product_id)
+            if current:
+                product[3] = current[3]
+            else:
+                forget_product(product_id)
+            continue
+
+        product[3] = stock - quantity
+        items_sold += quantity
+        session_total += quantity * price
+        print(f"  {name[:24]:<25} {quantity:>3} x ${price:<8.2f} = ${quantity * price:<9.2f}"
+              f" | Total: ${session_total:.2f}")
+
+    print("-" * 60)
+    print(f"Items Sold: {items_sold}")
+    print(f"Session Total: ${session_total:.2f}")
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 
+import argparse
 import mysql.connector
 from mysql.connector import Error
+from concurrent.futures import ThreadPoolExecutor
 import getpass
+import threading
+import time
 
 # configuring the database for regular user
 DATABASE_CONFIG = {
@@ -12,6 +16,50 @@ DATABASE_CONFIG = {
     'database': 'smallbiz_inventory'
 }
 
+# database instances ("shards"); each one holds the data of one or more stores
+SHARD_CONFIGS = {
+    'main': DATABASE_CONFIG
+}
+
+# which shard each store (outlet) lives on. To open a new outlet add it here;
+# busy outlets can be given a shard of their own so they never slow down others
+STORE_SHARDS = {
+    1: 'main'
+}
+
+# store used when none is selected (existing single-shop data belongs to it)
+DEFAULT_STORE_ID = 1
+
+_current_store_id = DEFAULT_STORE_ID
+
+# read replicas of each shard. SELECTs are sent to a replica, everything
+# else goes to the shard's primary (its entry in SHARD_CONFIGS)
+REPLICA_CONFIGS = {
+    'main': []
+}
+
+# after a write, reads of that shard stay on the primary this long so the
+# user always sees their own changes even if the replicas lag behind
+READ_AFTER_WRITE_SECONDS = 5
+
+# a replica that could not be reached is skipped this long before retrying
+REPLICA_RETRY_SECONDS = 30
+
+_replica_lock = threading.Lock()
+_replica_down_until = {}
+_replica_next = {}
+_last_write_at = {}
+
+# upper bound on connections opened at once by concurrent report queries
+REPORT_MAX_WORKERS = 4
+
+# largest number of IDs sent in one IN (...) lookup
+MULTI_GET_CHUNK_SIZE = 500
+
+# running totals of database work, read by the profiler (see profiler.py)
+_query_stats = {'queries': 0, 'db_time': 0.0, 'rows': 0}
+_query_stats_lock = threading.Lock()
+
 # configuring the root for setup
 ROOT_CONFIG = {
     'host': 'localhost',
@@ -89,69 +137,253 @@ def setup_database_and_user():
             root_connection.close()
         return False
 
-def create_tables():
-    """Create required tables"""
-    print("Creating tables...")
-
 # this is a dictionary we are gonna use to store a sql stmt that is going to create table
-    tables = {
-        'products': """
-            CREATE TABLE IF NOT EXISTS products (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(100) NOT NULL UNIQUE,
-                price DECIMAL(10,2) NOT NULL,
-                quantity INT NOT NULL,
-                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """,
-        'sales': """
-            CREATE TABLE IF NOT EXISTS sales (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                product_id INT,
-                product_name VARCHAR(100),
-                quantity_sold INT NOT NULL,
-                sale_price DECIMAL(10,2) NOT NULL,
-                total_amount DECIMAL(10,2) NOT NULL,
-                sale_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
-            )
-        """
-    }
-    
+TABLES = {
+    'products': """
+        CREATE TABLE IF NOT EXISTS products (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            store_id INT NOT NULL DEFAULT 1,
+            name VARCHAR(100) NOT NULL,
+            price DECIMAL(10,2) NOT NULL,
+            quantity INT NOT NULL,
+            sku VARCHAR(64) NULL,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            UNIQUE KEY uq_products_store_name (store_id, name),
+            UNIQUE KEY uq_products_store_sku (store_id, sku),
+            INDEX idx_products_store_updated (store_id, updated_at)
+        )
+    """,
+    # product names are not copied into sales: reports look up the current
+    # name by product_id, and total_amount is computed, not stored
+    'sales': """
+        CREATE TABLE IF NOT EXISTS sales (
+            id INT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+            store_id SMALLINT UNSIGNED NOT NULL DEFAULT 1,
+            product_id INT,
+            quantity_sold INT NOT NULL,
+            sale_price DECIMAL(10,2) NOT NULL,
+            total_amount DECIMAL(14,2) AS (quantity_sold * sale_price) VIRTUAL,
+            sale_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_sales_store_date (store_id, sale_date),
+            INDEX idx_sales_store_id (store_id, id),
+            FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
+        )
+    """,
+    # append-only ledger of every stock change; no foreign key so the
+    # history of deleted products is kept
+    'stock_movements': """
+        CREATE TABLE IF NOT EXISTS stock_movements (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            store_id INT NOT NULL,
+            product_id INT NOT NULL,
+            movement_type ENUM('sale', 'restock', 'adjustment') NOT NULL,
+            quantity_change INT NOT NULL,
+            sale_id INT NULL,
+            movement_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    'stock_snapshots': """
+        CREATE TABLE IF NOT EXISTS stock_snapshots (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            store_id INT NOT NULL,
+            last_movement_id INT NOT NULL DEFAULT 0,
+            snapshot_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_snapshots_store_date (store_id, snapshot_date)
+        )
+    """,
+    'stock_snapshot_items': """
+        CREATE TABLE IF NOT EXISTS stock_snapshot_items (
+            snapshot_id INT NOT NULL,
+            product_id INT NOT NULL,
+            quantity INT NOT NULL,
+            unit_price DECIMAL(10,2) NOT NULL,
+            PRIMARY KEY (snapshot_id, product_id),
+            FOREIGN KEY (snapshot_id) REFERENCES stock_snapshots(id) ON DELETE CASCADE
+        )
+    """
+}
+
+# changes applied to databases created by earlier versions, as
+# (table, column or index that marks the change as applied, ALTER statement)
+SCHEMA_UPGRADES = [
+    ('products', 'store_id', """
+        ALTER TABLE products
+            ADD COLUMN store_id INT NOT NULL DEFAULT 1 AFTER id,
+            DROP INDEX name,
+            ADD UNIQUE KEY uq_products_store_name (store_id, name)
+    """),
+    ('sales', 'store_id', """
+        ALTER TABLE sales
+            ADD COLUMN store_id INT NOT NULL DEFAULT 1 AFTER id,
+            ADD INDEX idx_sales_store_date (store_id, sale_date)
+    """),
+    ('products', 'sku', """
+        ALTER TABLE products
+            ADD COLUMN sku VARCHAR(64) NULL AFTER quantity,
+            ADD UNIQUE KEY uq_products_store_sku (store_id, sku)
+    """),
+    ('products', 'updated_at', """
+        ALTER TABLE products
+            ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            ADD INDEX idx_products_store_updated (store_id, updated_at)
+    """),
+    # makes MAX(id) per store a single index lookup for the report cache
+    ('sales', 'idx_sales_store_id', """
+        ALTER TABLE sales ADD INDEX idx_sales_store_id (store_id, id)
+    """)
+]
+
+# rows copied per INSERT ... SELECT when moving sales into the compact layout
+SALES_MIGRATION_CHUNK_ROWS = 50000
+
+def _column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+def _index_exists(cursor, table, index):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index))
+    return cursor.fetchone()[0] > 0
+
+def _compact_sales(connection, cursor):
+    """Move sales rows of the old layout (with product_name) into the compact one
+
+    Rows are copied into a new table in ID-range chunks, each committed on
+    its own, so large histories never run as one huge transaction. Sales
+    added meanwhile are copied while both tables are write-locked, and the
+    tables are then swapped with one atomic RENAME. Run through
+    compact_sales(), which makes sure only one process migrates a shard.
+    """
+    print("Compacting table 'sales'...")
+    cursor.execute("DROP TABLE IF EXISTS sales_compact")
+    cursor.execute(TABLES['sales'].replace("EXISTS sales (", "EXISTS sales_compact ("))
+
+    copy_sql = """
+        INSERT INTO sales_compact (id, store_id, product_id, quantity_sold, sale_price, sale_date)
+        SELECT id, store_id, product_id, quantity_sold, sale_price, sale_date
+        FROM sales WHERE id > %s
+    """
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM sales")
+    max_id = cursor.fetchone()[0]
+    copied_up_to = 0
+    while copied_up_to < max_id:
+        chunk_end = min(copied_up_to + SALES_MIGRATION_CHUNK_ROWS, max_id)
+        cursor.execute(copy_sql + " AND id <= %s", (copied_up_to, chunk_end))
+        connection.commit()
+        copied_up_to = chunk_end
+
+    cursor.execute("LOCK TABLES sales WRITE, sales_compact WRITE")
     try:
-        connection = get_connection()
-        if not connection:
-            print("Could not connect to database for table creation")
+        cursor.execute(copy_sql, (copied_up_to,))
+        connection.commit()
+        cursor.execute("SELECT (SELECT COUNT(*) FROM sales), (SELECT COUNT(*) FROM sales_compact)")
+        old_rows, new_rows = cursor.fetchone()
+        if old_rows != new_rows:
+            raise Error(f"sales compaction copied {new_rows} of {old_rows} rows")
+        cursor.execute("RENAME TABLE sales TO sales_legacy, sales_compact TO sales")
+    finally:
+        cursor.execute("UNLOCK TABLES")
+    cursor.execute("DROP TABLE sales_legacy")
+    print(f"Moved {new_rows} sales to the compact layout")
+
+def _apply_schema_upgrades(cursor):
+    """Bring the tables of one shard up to the current schema"""
+    for table_name, marker, upgrade_sql in SCHEMA_UPGRADES:
+        if not (_column_exists(cursor, table_name, marker)
+                or _index_exists(cursor, table_name, marker)):
+            print(f"Upgrading table '{table_name}' ({marker})...")
+            cursor.execute(upgrade_sql)
+
+def _has_legacy_sales(shard, cursor):
+    """Tell, with instructions, if a shard's sales still need compact_sales()"""
+    if not _column_exists(cursor, 'sales', 'product_name'):
+        return False
+    print(f"Sales on shard '{shard}' still use the old layout. Stop every till on it, then run:")
+    print(f"  python database.py compact-sales --shard {shard}")
+    return True
+
+def compact_sales(shard):
+    """Convert the sales of a shard to the compact layout (one-off, run by hand)"""
+    connection = get_shard_connection(shard)
+    if not connection:
+        return False
+
+    cursor = connection.cursor()
+    try:
+        # named lock held for the whole migration: a second run stops at
+        # once instead of dropping the first one's half-made copy
+        cursor.execute("SELECT GET_LOCK(CONCAT('sales_compaction:', DATABASE()), 0)")
+        if cursor.fetchone()[0] != 1:
+            print(f"Sales compaction is already running on shard '{shard}'.")
             return False
-        
-        cursor = connection.cursor()
-        
-        for table_name, table_sql in tables.items():
-            print(f"Creating table '{table_name}'...")
-            cursor.execute(table_sql)
-            print(f"Table '{table_name}' created/verified")
+        try:
+            if _column_exists(cursor, 'sales', 'product_name'):
+                _compact_sales(connection, cursor)
+            else:
+                print(f"Sales on shard '{shard}' already use the compact layout.")
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(CONCAT('sales_compaction:', DATABASE()))")
+            cursor.fetchone()
+        return True
 
-        cursor.execute("SELECT COUNT(*) FROM products")
-        product_count = cursor.fetchone()[0]
-        
-        if product_count == 0:
-            print("Adding sample products...")
-            sample_products = [
-                ('Rice', 25.00, 50),
-                ('Sugar', 10.00, 80),
-                ('Cooking Oil', 15.50, 30),
-                ('Flour', 12.00, 45),
-                ('Salt', 5.00, 100),
-                ('Milk', 8.75, 25)
-            ]
-            
-            insert_query = "INSERT INTO products (name, price, quantity) VALUES (%s, %s, %s)"
-            cursor.executemany(insert_query, sample_products)
-            connection.commit()
-            print(f"Added {len(sample_products)} sample products")
-        
+    except Error as e:
+        print(f"Sales compaction error: {e}")
+        return False
+    finally:
         cursor.close()
         connection.close()
+
+def create_tables():
+    """Create required tables on every shard"""
+    print("Creating tables...")
+
+    try:
+        for shard in SHARD_CONFIGS:
+            connection = get_shard_connection(shard)
+            if not connection:
+                print(f"Could not connect to shard '{shard}' for table creation")
+                return False
+            
+            cursor = connection.cursor()
+            
+            for table_name, table_sql in TABLES.items():
+                print(f"Creating table '{table_name}' on shard '{shard}'...")
+                cursor.execute(table_sql)
+                print(f"Table '{table_name}' created/verified")
+            _apply_schema_upgrades(cursor)
+            if _has_legacy_sales(shard, cursor):
+                connection.close()
+                return False
+
+            # sample products go to the default store only
+            if STORE_SHARDS[DEFAULT_STORE_ID] == shard:
+                cursor.execute("SELECT COUNT(*) FROM products WHERE store_id = %s", (DEFAULT_STORE_ID,))
+                product_count = cursor.fetchone()[0]
+                
+                if product_count == 0:
+                    print("Adding sample products...")
+                    sample_products = [
+                        ('Rice', 25.00, 50),
+                        ('Sugar', 10.00, 80),
+                        ('Cooking Oil', 15.50, 30),
+                        ('Flour', 12.00, 45),
+                        ('Salt', 5.00, 100),
+                        ('Milk', 8.75, 25)
+                    ]
+                    
+                    insert_query = "INSERT INTO products (store_id, name, price, quantity) VALUES (%s, %s, %s, %s)"
+                    cursor.executemany(insert_query, [(DEFAULT_STORE_ID,) + product for product in sample_products])
+                    connection.commit()
+                    print(f"Added {len(sample_products)} sample products")
+            
+            cursor.close()
+            connection.close()
         
         print("Tables created successfully!")
         return True
@@ -160,16 +392,114 @@ def create_tables():
         print(f"Table creation error: {e}")
         return False
 
-def get_connection():
-    """Create and return MySQL database connection"""
+def upgrade_schema(shards=None):
+    """Create missing tables and apply schema upgrades on the given shards (default: all)"""
+    try:
+        for shard in shards or SHARD_CONFIGS:
+            connection = get_shard_connection(shard)
+            if not connection:
+                print(f"Could not connect to shard '{shard}'")
+                return False
+
+            cursor = connection.cursor()
+            for table_sql in TABLES.values():
+                cursor.execute(table_sql)
+            _apply_schema_upgrades(cursor)
+            legacy_sales = _has_legacy_sales(shard, cursor)
+            cursor.close()
+            connection.close()
+            if legacy_sales:
+                return False
+        return True
+
+    except Error as e:
+        print(f"Schema upgrade error: {e}")
+        return False
+
+def set_current_store(store_id):
+    """Select the store that queries and reports work on"""
+    global _current_store_id
+    if store_id not in STORE_SHARDS:
+        print(f"Unknown store {store_id}. Configured stores: {', '.join(map(str, STORE_SHARDS))}")
+        return False
+    _current_store_id = store_id
+    return True
+
+def get_current_store():
+    """Return the ID of the store currently being worked on"""
+    return _current_store_id
+
+def get_store_shard(store_id=None):
+    """Return the name of the shard holding a store (default: current store)"""
+    if store_id is None:
+        store_id = _current_store_id
+    return STORE_SHARDS[store_id]
+
+def get_shard_connection(shard):
+    """Create and return a connection to one shard"""
     try:
-        connection = mysql.connector.connect(**DATABASE_CONFIG)
+        connection = mysql.connector.connect(**SHARD_CONFIGS[shard])
         if connection.is_connected():
             return connection
     except Error as e:
-        print(f"Database connection error: {e}")
+        print(f"Database connection error ({shard}): {e}")
         return None
 
+def get_connection(store_id=None):
+    """Create and return MySQL database connection for a store's shard"""
+    return get_shard_connection(get_store_shard(store_id))
+
+def _mark_write(shard):
+    """Remember that the primary of a shard was just written to"""
+    with _replica_lock:
+        _last_write_at[shard] = time.monotonic()
+
+def _replica_candidates(shard):
+    """Return the healthy replicas of a shard, rotated for round-robin use"""
+    replicas = REPLICA_CONFIGS.get(shard, [])
+    now = time.monotonic()
+    with _replica_lock:
+        if now - _last_write_at.get(shard, float('-inf')) < READ_AFTER_WRITE_SECONDS:
+            return []
+        start = _replica_next.get(shard, 0)
+        _replica_next[shard] = start + 1
+        order = [(start + offset) % len(replicas) for offset in range(len(replicas))]
+        return [index for index in order
+                if _replica_down_until.get((shard, index), 0) <= now]
+
+def get_read_connection(store_id=None, shard=None):
+    """Return a connection for read-only queries: a healthy replica, else the primary"""
+    shard = shard or get_store_shard(store_id)
+    for index in _replica_candidates(shard):
+        try:
+            connection = mysql.connector.connect(**REPLICA_CONFIGS[shard][index])
+            if connection.is_connected():
+                return connection
+        except Error as e:
+            print(f"Replica {index} of shard '{shard}' unavailable, using primary: {e}")
+        with _replica_lock:
+            _replica_down_until[(shard, index)] = time.monotonic() + REPLICA_RETRY_SECONDS
+    return get_shard_connection(shard)
+
+def check_replicas():
+    """Health-check every replica and return {(shard, index): healthy}"""
+    health = {}
+    for shard, replicas in REPLICA_CONFIGS.items():
+        for index, config in enumerate(replicas):
+            try:
+                connection = mysql.connector.connect(**config)
+                healthy = connection.is_connected()
+                connection.close()
+            except Error:
+                healthy = False
+            with _replica_lock:
+                if healthy:
+                    _replica_down_until.pop((shard, index), None)
+                else:
+                    _replica_down_until[(shard, index)] = time.monotonic() + REPLICA_RETRY_SECONDS
+            health[(shard, index)] = healthy
+    return health
+
 def test_connection():
     """Test the database connection"""
     try:
@@ -193,6 +523,12 @@ def initialize_database():
 
     if test_connection():
         print("Database connection successful!")
+        # only the current store's shard: an outlet must be able to start
+        # while another database instance is down. Other shards are
+        # upgraded when one of their own stores starts.
+        if not upgrade_schema([get_store_shard()]):
+            print("Failed to upgrade database schema")
+            return False
         print("Database already set up and ready to use.")
         return True
     
@@ -200,7 +536,7 @@ def initialize_database():
     print("\nThis will create:")
     print("  • Database: smallbiz_inventory")
     print("  • User: group6@localhost")
-    print("  • Tables: products, sales")
+    print("  • Tables: products, sales, stock ledger")
     print("  • Sample data")
     
     proceed = input("\nProceed with automatic setup? (y/N): ").lower().strip()
@@ -228,10 +564,38 @@ def initialize_database():
     
     return True
 
-def execute_query(query, params=None):
-    """Execute a query and return results"""
+def _record_query_stats(elapsed, rows, queries=1):
+    """Add one query's cost to the running database totals"""
+    with _query_stats_lock:
+        _query_stats['queries'] += queries
+        _query_stats['db_time'] += elapsed
+        _query_stats['rows'] += rows
+
+def get_query_stats():
+    """Return a copy of the running database totals"""
+    with _query_stats_lock:
+        return dict(_query_stats)
+
+def reset_query_stats():
+    """Reset the running database totals to zero"""
+    with _query_stats_lock:
+        _query_stats.update(queries=0, db_time=0.0, rows=0)
+
+def execute_query(query, params=None, store_id=None, shard=None):
+    """Execute a query on a store's shard (or the given shard) and return results
+
+    SELECTs are read from a replica when one is configured and healthy;
+    all other statements are written to the shard's primary.
+    """
+    started = time.perf_counter()
+    rows = 0
+    is_read = query.strip().upper().startswith('SELECT')
     try:
-        connection = get_connection()
+        shard = shard or get_store_shard(store_id)
+        if is_read:
+            connection = get_read_connection(shard=shard)
+        else:
+            connection = get_shard_connection(shard)
         if not connection:
             return None
             
@@ -242,10 +606,12 @@ def execute_query(query, params=None):
         else:
             cursor.execute(query)
         
-        if query.strip().upper().startswith('SELECT'):
+        if is_read:
             result = cursor.fetchall()
+            rows = len(result)
         else:
             connection.commit()
+            _mark_write(shard)
             result = cursor.lastrowid
         
         cursor.close()
@@ -254,12 +620,217 @@ def execute_query(query, params=None):
     except Error as e:
         print(f"Database error: {e}")
         return None
+    finally:
+        _record_query_stats(time.perf_counter() - started, rows)
+
+def execute_transaction(statements, store_id=None):
+    """Run write statements atomically on a store's primary and return their lastrowids
+
+    statements is a list of (query, params) pairs. A statement given as
+    (query, params, True) must change at least one row, otherwise the whole
+    transaction is rolled back and None is returned.
+    """
+    started = time.perf_counter()
+    shard = get_store_shard(store_id)
+    connection = None
+    try:
+        connection = get_shard_connection(shard)
+        if not connection:
+            return None
+
+        connection.start_transaction()
+        cursor = connection.cursor()
+        results = []
+        for query, params, *required in statements:
+            cursor.execute(query, params)
+            if required and required[0] and cursor.rowcount < 1:
+                connection.rollback()
+                return None
+            results.append(cursor.lastrowid)
+
+        connection.commit()
+        _mark_write(shard)
+        cursor.close()
+        return results
+    except Error as e:
+        print(f"Database error: {e}")
+        if connection:
+            try:
+                connection.rollback()
+            except Error:
+                pass
+        return None
+    finally:
+        if connection:
+            connection.close()
+        _record_query_stats(time.perf_counter() - started, 0, queries=len(statements))
+
+def iter_query(query, params=None, chunk_size=1000, store_id=None, shard=None, connection=None):
+    """Stream SELECT results in chunks from an unbuffered server-side cursor
+
+    Pass connection to read inside a transaction the caller opened; it is
+    left open. Otherwise a read connection is opened and closed here.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = get_read_connection(store_id, shard)
+    if not connection:
+        raise Error("Could not connect to database")
+
+    # unbuffered cursor: rows stay on the server until we fetch them, so
+    # memory use depends on chunk_size and not on the size of the result
+    cursor = connection.cursor(buffered=False)
+    try:
+        started = time.perf_counter()
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        _record_query_stats(time.perf_counter() - started, 0)
+
+        while True:
+            started = time.perf_counter()
+            rows = cursor.fetchmany(chunk_size)
+            _record_query_stats(time.perf_counter() - started, len(rows), queries=0)
+            if not rows:
+                break
+            yield rows
+    finally:
+        try:
+            cursor.close()
+        except Error:
+            # closing with unread rows left (consumer stopped early)
+            pass
+        if own_connection:
+            connection.close()
+
+_report_pool = None
+_report_pool_lock = threading.Lock()
+
+def _get_report_pool():
+    """Return the shared thread pool used for concurrent report queries"""
+    global _report_pool
+    with _report_pool_lock:
+        if _report_pool is None:
+            _report_pool = ThreadPoolExecutor(max_workers=REPORT_MAX_WORKERS,
+                                              thread_name_prefix="report-query")
+        return _report_pool
+
+def execute_queries_concurrently(queries):
+    """Run independent queries in parallel and return their results by name
+
+    queries maps a name to a (query, params) pair. Every query runs through
+    execute_query on its own connection, so a report takes as long as its
+    slowest query instead of the sum of all of them.
+    """
+    pool = _get_report_pool()
+    futures = {
+        name: pool.submit(execute_query, query, params)
+        for name, (query, params) in queries.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
+
+def execute_on_all_stores(queries):
+    """Scatter named queries to every shard concurrently and gather the results
+
+    queries maps a name to a (query, params) pair. Each query must contain a
+    {stores} placeholder inside an IN (...) list; it is filled with the IDs of
+    the stores on each shard, whose values go in front of params. Returns
+    results[name][shard]; a shard that fails gives None, so callers can still
+    merge the partial results of the others.
+    """
+    stores_by_shard = {}
+    for store_id, shard in STORE_SHARDS.items():
+        stores_by_shard.setdefault(shard, []).append(store_id)
+
+    pool = _get_report_pool()
+    futures = {}
+    for name, (query, params) in queries.items():
+        for shard, store_ids in stores_by_shard.items():
+            shard_query = query.format(stores=", ".join(["%s"] * len(store_ids)))
+            shard_params = tuple(store_ids) + tuple(params or ())
+            futures[(name, shard)] = pool.submit(execute_query, shard_query, shard_params, shard=shard)
+
+    results = {name: {} for name in queries}
+    for (name, shard), future in futures.items():
+        results[name][shard] = future.result()
+    return results
+
+def get_products_by_ids(product_ids, store_id=None):
+    """Fetch many products of a store with one IN (...) query per chunk
+
+    Returns {id: (id, name, price, quantity)} for the IDs that exist, or
+    None if the lookup failed.
+    """
+    if store_id is None:
+        store_id = get_current_store()
+    ids = list(dict.fromkeys(product_ids))
+
+    products = {}
+    for start in range(0, len(ids), MULTI_GET_CHUNK_SIZE):
+        chunk = ids[start:start + MULTI_GET_CHUNK_SIZE]
+        placeholders = ", ".join(["%s"] * len(chunk))
+        query = f"""
+            SELECT id, name, price, quantity FROM products
+            WHERE store_id = %s AND id IN ({placeholders})
+        """
+        result = execute_query(query, (store_id,) + tuple(chunk), store_id=store_id)
+        if result is None:
+            return None
+        for product in result:
+            products[product[0]] = product
+    return products
 
 def get_product_by_id(product_id):
-    """Get single product by ID"""
-    query = "SELECT id, name, price, quantity FROM products WHERE id = %s"
-    result = execute_query(query, (product_id,))
-    return result[0] if result else None
+    """Get single product of the current store by ID"""
+    products = get_products_by_ids([product_id])
+    return products.get(product_id) if products else None
+
+class ProductLoader:
+    """Coalesce the product lookups of one operation into batched queries
+
+    Register every ID an operation will need with request(), then read them
+    with get() or get_many(): the first read fetches everything requested so
+    far in one round-trip. Results are kept for the life of the loader, so
+    use a new one per operation.
+    """
+
+    def __init__(self, store_id=None):
+        self.store_id = get_current_store() if store_id is None else store_id
+        self._products = {}
+        self._pending = {}
+
+    def request(self, *product_ids):
+        """Queue IDs to be fetched with the next batch"""
+        for product_id in product_ids:
+            if product_id not in self._products:
+                self._pending[product_id] = None
+
+    def _load_pending(self):
+        if not self._pending:
+            return
+        ids = list(self._pending)
+        self._pending.clear()
+        found = get_products_by_ids(ids, self.store_id)
+        if found is None:
+            # leave failed IDs unresolved so a later read retries them
+            return
+        for product_id in ids:
+            self._products[product_id] = found.get(product_id)
+
+    def get(self, product_id):
+        """Return (id, name, price, quantity) or None if there is no such product"""
+        self.request(product_id)
+        self._load_pending()
+        return self._products.get(product_id)
+
+    def get_many(self, product_ids):
+        """Return {id: product} for the given IDs that exist"""
+        product_ids = list(product_ids)
+        self.request(*product_ids)
+        self._load_pending()
+        return {product_id: self._products[product_id] for product_id in product_ids
+                if self._products.get(product_id)}
 
 def show_database_status():
     """Show current database status"""
@@ -270,34 +841,51 @@ def show_database_status():
     if test_connection():
         print("Database Connection: WORKING")
 
-        try:
-            connection = get_connection()
-            cursor = connection.cursor()
+        for (shard, index), healthy in check_replicas().items():
+            print(f"Replica {index} of shard '{shard}': {'WORKING' if healthy else 'DOWN (reads use primary)'}")
+
+        store_id = get_current_store()
+        print(f"Store: {store_id} (shard '{get_store_shard(store_id)}')")
+
+        results = execute_queries_concurrently({
+            'products': ("SELECT COUNT(*) FROM products WHERE store_id = %s", (store_id,)),
+            'sales': ("SELECT COUNT(*) FROM sales WHERE store_id = %s", (store_id,)),
+            'sample': ("SELECT name, price, quantity FROM products WHERE store_id = %s LIMIT 3", (store_id,))
+        })
 
-            cursor.execute("SELECT COUNT(*) FROM products")
-            product_count = cursor.fetchone()[0]
+        if results['products'] is None or results['sales'] is None:
+            print("Error checking database status")
+        else:
+            product_count = results['products'][0][0]
             print(f"Products in inventory: {product_count}")
 
-            cursor.execute("SELECT COUNT(*) FROM sales")
-            sales_count = cursor.fetchone()[0]
+            sales_count = results['sales'][0][0]
             print(f"Sales records: {sales_count}")
-  
-            if product_count > 0:
-                cursor.execute("SELECT name, price, quantity FROM products LIMIT 3")
-                products = cursor.fetchall()
+
+            if product_count > 0 and results['sample']:
                 print(f"\nSample products:")
-                for name, price, qty in products:
+                for name, price, qty in results['sample']:
                     print(f"   • {name}: ${price:.2f} (Stock: {qty})")
                 if product_count > 3:
                     print(f"   ... and {product_count - 3} more products")
-            
-            cursor.close()
-            connection.close()
-            
-        except Error as e:
-            print(f"Error checking database status: {e}")
     else:
         print("Database Connection: FAILED")
         print("Run initialize_database() to set up automatically")
     
-    print("="*60)
\ No newline at end of file
+    print("="*60)
+
+def main():
+    parser = argparse.ArgumentParser(description="SmallBiz database maintenance")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    compact_parser = subparsers.add_parser('compact-sales',
+                                           help="convert sales to the compact layout (stop the tills first)")
+    compact_parser.add_argument('--shard', choices=sorted(SHARD_CONFIGS),
+                                help="shard to convert (default: every shard)")
+    args = parser.parse_args()
+
+    shards = [args.shard] if args.shard else list(SHARD_CONFIGS)
+    return 0 if all([compact_sales(shard) for shard in shards]) else 1
+
+# One-off maintenance from the command line
+if __name__ == "__main__":
+    raise SystemExit(main())
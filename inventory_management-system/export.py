@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import gzip
+import json
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from database import get_current_store, iter_query, set_current_store
+from utils import clear_screen
+from mysql.connector import Error
+
+# columns written for each exportable table, in file order
+EXPORT_COLUMNS = {
+    'products': ['id', 'store_id', 'name', 'price', 'quantity', 'created_date'],
+    'sales': ['id', 'store_id', 'product_id', 'product_name', 'quantity_sold',
+              'sale_price', 'total_amount', 'sale_date']
+}
+
+# sales store a product_id only; the current product name is joined in
+EXPORT_SOURCES = {
+    'products': 'products',
+    'sales': 'sales LEFT JOIN products ON products.id = sales.product_id'
+}
+
+# select expressions of exported columns that are not stored in the table
+EXPORT_EXPRESSIONS = {
+    'sales': {'product_name': 'products.name'}
+}
+
+# column used for the date-range filter of each table
+DATE_COLUMNS = {
+    'products': 'created_date',
+    'sales': 'sale_date'
+}
+
+# column used for the product filter of each table
+PRODUCT_COLUMNS = {
+    'products': 'id',
+    'sales': 'product_id'
+}
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+CHUNK_SIZE = 5000
+PROGRESS_INTERVAL = 100000
+
+def build_export_query(table, store_id, start_date=None, end_date=None, product_id=None):
+    """Build the SELECT statement and parameters for an export"""
+    conditions = [f"{table}.store_id = %s"]
+    params = [store_id]
+
+    if start_date:
+        conditions.append(f"{table}.{DATE_COLUMNS[table]} >= %s")
+        params.append(start_date)
+    if end_date:
+        # end date is inclusive, so compare against the start of the next day
+        conditions.append(f"{table}.{DATE_COLUMNS[table]} < %s")
+        params.append(end_date + timedelta(days=1))
+    if product_id is not None:
+        conditions.append(f"{table}.{PRODUCT_COLUMNS[table]} = %s")
+        params.append(product_id)
+
+    expressions = EXPORT_EXPRESSIONS.get(table, {})
+    select_list = [expressions.get(column, f"{table}.{column}") for column in EXPORT_COLUMNS[table]]
+    query = f"SELECT {', '.join(select_list)} FROM {EXPORT_SOURCES[table]}"
+    query += " WHERE " + " AND ".join(conditions)
+    query += f" ORDER BY {table}.id"
+
+    return query, tuple(params)
+
+def _json_value(value):
+    """Convert database values that json cannot encode"""
+    if isinstance(value, Decimal):
+        # keep money values exact instead of going through float
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+def _open_output(path, compress):
+    """Open the output file, gzip-compressed if requested"""
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+def _print_progress(rows, started):
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed > 0 else 0
+    print(f"  {rows:,} rows exported ({rate:,.0f} rows/s)")
+
+def export_table(table, path, fmt='csv', start_date=None, end_date=None,
+                 product_id=None, compress=None, chunk_size=CHUNK_SIZE):
+    """Stream a table of the current store to a CSV or JSONL file and return the number of rows written"""
+    if table not in EXPORT_COLUMNS:
+        print(f"Unknown table '{table}'. Choose from: {', '.join(EXPORT_COLUMNS)}")
+        return None
+    if fmt not in EXPORT_FORMATS:
+        print(f"Unknown format '{fmt}'. Choose from: {', '.join(EXPORT_FORMATS)}")
+        return None
+    if compress is None:
+        compress = path.endswith('.gz')
+
+    columns = EXPORT_COLUMNS[table]
+    store_id = get_current_store()
+    query, params = build_export_query(table, store_id, start_date, end_date, product_id)
+
+    rows_written = 0
+    next_report = PROGRESS_INTERVAL
+    started = time.perf_counter()
+
+    try:
+        with _open_output(path, compress) as output:
+            if fmt == 'csv':
+                writer = csv.writer(output)
+                writer.writerow(columns)
+
+            for chunk in iter_query(query, params, chunk_size, store_id):
+                if fmt == 'csv':
+                    writer.writerows(chunk)
+                else:
+                    output.writelines(
+                        json.dumps({column: _json_value(value)
+                                    for column, value in zip(columns, row)}) + "\n"
+                        for row in chunk
+                    )
+
+                rows_written += len(chunk)
+                if rows_written >= next_report:
+                    _print_progress(rows_written, started)
+                    next_report += PROGRESS_INTERVAL
+
+    except Error as e:
+        print(f"Database error during export: {e}")
+        return None
+    except OSError as e:
+        print(f"Could not write export file: {e}")
+        return None
+
+    elapsed = time.perf_counter() - started
+    rate = rows_written / elapsed if elapsed > 0 else 0
+    print(f"Exported {rows_written:,} rows from '{table}' (store {store_id}) to {path}")
+    print(f"Elapsed: {elapsed:.1f}s ({rate:,.0f} rows/s)")
+    return rows_written
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def export_data():
+    """Interactively export products or sales to a file"""
+    clear_screen()
+    print("="*60)
+    print("                    EXPORT DATA")
+    print("="*60)
+
+    print("1. Products")
+    print("2. Sales")
+    choice = input("Select data to export (1-2): ").strip()
+    if choice == '1':
+        table = 'products'
+    elif choice == '2':
+        table = 'sales'
+    else:
+        print("Invalid option selected")
+        return
+
+    fmt = input("Format (csv/jsonl) [csv]: ").strip().lower() or 'csv'
+    if fmt not in EXPORT_FORMATS:
+        print("Invalid format. Please choose csv or jsonl.")
+        return
+
+    compress = input("Compress with gzip? (y/N): ").lower().strip() == 'y'
+
+    try:
+        start_input = input("Start date YYYY-MM-DD (Enter for no limit): ").strip()
+        start_date = _parse_date(start_input) if start_input else None
+        end_input = input("End date YYYY-MM-DD (Enter for no limit): ").strip()
+        end_date = _parse_date(end_input) if end_input else None
+    except ValueError:
+        print("Invalid date format. Please use YYYY-MM-DD.")
+        return
+
+    try:
+        product_input = input("Product ID (Enter for all products): ").strip()
+        product_id = int(product_input) if product_input else None
+    except ValueError:
+        print("Please enter a valid product ID number.")
+        return
+
+    default_path = f"{table}_store{get_current_store()}_{datetime.now():%Y%m%d_%H%M%S}.{fmt}"
+    if compress:
+        default_path += ".gz"
+    path = input(f"Output file [{default_path}]: ").strip() or default_path
+
+    print(f"\nExporting {table}...")
+    export_table(table, path, fmt, start_date, end_date, product_id, compress)
+
+def main():
+    parser = argparse.ArgumentParser(description="Export SmallBiz inventory data")
+    parser.add_argument('table', choices=sorted(EXPORT_COLUMNS))
+    parser.add_argument('path', help="output file; a .gz suffix enables compression")
+    parser.add_argument('--format', dest='fmt', choices=EXPORT_FORMATS, default='csv')
+    parser.add_argument('--start', type=_parse_date, help="first day to include (YYYY-MM-DD)")
+    parser.add_argument('--end', type=_parse_date, help="last day to include (YYYY-MM-DD)")
+    parser.add_argument('--product', type=int, help="only export this product ID")
+    parser.add_argument('--store', type=int, help="store (outlet) to export (default: the default store)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    if args.store is not None and not set_current_store(args.store):
+        return 1
+
+    result = export_table(args.table, args.path, args.fmt, args.start, args.end,
+                          args.product, chunk_size=args.chunk_size)
+    return 0 if result is not None else 1
+
+# Run an export from the command line, e.g. for scheduled accounting dumps
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+import argparse
+from datetime import datetime, timedelta
+
+from database import (execute_query, execute_queries_concurrently, execute_transaction,
+                      get_current_store, set_current_store)
+from utils import clear_screen
+
+# a new stock snapshot is taken when the latest one is older than this
+SNAPSHOT_INTERVAL_HOURS = 24
+
+# values of the stock_movements.movement_type ENUM
+MOVEMENT_TYPES = ('sale', 'restock', 'adjustment')
+
+def movement_statement(product_id, movement_type, quantity_change, sale_id=None):
+    """Return the (query, params) that appends one entry to the stock ledger"""
+    if movement_type not in MOVEMENT_TYPES:
+        raise ValueError(f"Unknown movement type '{movement_type}'")
+    query = """
+        INSERT INTO stock_movements (store_id, product_id, movement_type, quantity_change, sale_id)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+    return (query, (get_current_store(), product_id, movement_type, quantity_change, sale_id))
+
+def take_snapshot():
+    """Materialize the current stock of the current store and return the snapshot ID"""
+    store_id = get_current_store()
+    # The item copy is a locking read of the store's products, so stock
+    # changes (which update a product row before writing their ledger
+    # entry) wait until the snapshot commits. Every movement up to
+    # last_movement_id is therefore included in the snapshot and every
+    # later one is not.
+    result = execute_transaction([
+        ("INSERT INTO stock_snapshots (store_id) VALUES (%s)", (store_id,)),
+        ("""
+            INSERT INTO stock_snapshot_items (snapshot_id, product_id, quantity, unit_price)
+            SELECT LAST_INSERT_ID(), id, quantity, price FROM products WHERE store_id = %s
+        """, (store_id,)),
+        ("""
+            UPDATE stock_snapshots
+            SET last_movement_id = (SELECT COALESCE(MAX(id), 0) FROM stock_movements)
+            WHERE id = LAST_INSERT_ID()
+        """, None)
+    ])
+    return result[0] if result else None
+
+def take_snapshot_if_due():
+    """Take a snapshot of the current store if the latest one is too old"""
+    query = """
+        SELECT COUNT(*) FROM stock_snapshots
+        WHERE store_id = %s AND snapshot_date > NOW() - INTERVAL %s HOUR
+    """
+    result = execute_query(query, (get_current_store(), SNAPSHOT_INTERVAL_HOURS))
+    if result is None or result[0][0] > 0:
+        return None
+    return take_snapshot()
+
+def get_inventory_as_of(as_of):
+    """Return stock levels of the current store at a point in time
+
+    Starts from the snapshot nearest to as_of and replays only the ledger
+    entries between it and as_of: forward from an earlier snapshot, or
+    backward from a later one. Returns (rows, info) where rows are
+    (product_id, name, quantity, unit_price) and info describes the
+    snapshot used, or None if no snapshot exists yet.
+    """
+    store_id = get_current_store()
+    snapshots = execute_queries_concurrently({
+        'before': ("""
+            SELECT id, snapshot_date, last_movement_id FROM stock_snapshots
+            WHERE store_id = %s AND snapshot_date <= %s
+            ORDER BY snapshot_date DESC LIMIT 1
+        """, (store_id, as_of)),
+        'after': ("""
+            SELECT id, snapshot_date, last_movement_id FROM stock_snapshots
+            WHERE store_id = %s AND snapshot_date > %s
+            ORDER BY snapshot_date ASC LIMIT 1
+        """, (store_id, as_of))
+    })
+    before = snapshots['before'][0] if snapshots['before'] else None
+    after = snapshots['after'][0] if snapshots['after'] else None
+    if not before and not after:
+        return None
+
+    # replay from whichever snapshot is closer; the other one bounds the replay
+    forward = before and (not after or as_of - before[1] <= after[1] - as_of)
+    base = before if forward else after
+
+    conditions = ["store_id = %s", "id > %s"]
+    params = [store_id, before[2] if before else 0]
+    if after:
+        conditions.append("id <= %s")
+        params.append(after[2])
+    conditions.append("movement_date <= %s" if forward else "movement_date > %s")
+    params.append(as_of)
+
+    results = execute_queries_concurrently({
+        'items': ("""
+            SELECT product_id, quantity, unit_price FROM stock_snapshot_items
+            WHERE snapshot_id = %s
+        """, (base[0],)),
+        'movements': (f"""
+            SELECT product_id, SUM(quantity_change), COUNT(*) FROM stock_movements
+            WHERE {' AND '.join(conditions)}
+            GROUP BY product_id
+        """, tuple(params)),
+        'products': ("SELECT id, name, price FROM products WHERE store_id = %s", (store_id,))
+    })
+    if results['items'] is None or results['movements'] is None or results['products'] is None:
+        return None
+
+    products = {product_id: (name, price) for product_id, name, price in results['products']}
+    stock = {product_id: [quantity, unit_price]
+             for product_id, quantity, unit_price in results['items']}
+
+    replayed = 0
+    for product_id, change, count in results['movements']:
+        entry = stock.setdefault(product_id, [0, products.get(product_id, (None, 0))[1]])
+        entry[0] += change if forward else -change
+        replayed += count
+
+    rows = []
+    for product_id, (quantity, unit_price) in stock.items():
+        if quantity == 0 and product_id not in products:
+            continue
+        name = products.get(product_id, (f"(deleted product #{product_id})", None))[0]
+        rows.append((product_id, name, quantity, unit_price))
+    rows.sort(key=lambda row: row[1])
+
+    info = {
+        'snapshot_id': base[0],
+        'snapshot_date': base[1],
+        'direction': 'forward' if forward else 'backward',
+        'movements_replayed': replayed
+    }
+    return rows, info
+
+def inventory_as_of():
+    """Show stock levels and inventory value at the end of a given day"""
+    clear_screen()
+    print("="*60)
+    print("                 INVENTORY AS OF DATE")
+    print("="*60)
+
+    try:
+        date_input = input("Date (YYYY-MM-DD): ").strip()
+        as_of = datetime.strptime(date_input, '%Y-%m-%d') + timedelta(days=1, microseconds=-1)
+    except ValueError:
+        print("Invalid date format. Please use YYYY-MM-DD.")
+        return
+
+    result = get_inventory_as_of(as_of)
+    if result is None:
+        print("No stock snapshots available yet.")
+        print("A snapshot is taken automatically when the application starts.")
+        return
+
+    rows, info = result
+    print(f"\nStock at end of {as_of:%Y-%m-%d}")
+    print(f"(snapshot #{info['snapshot_id']} of {info['snapshot_date']:%Y-%m-%d %H:%M}, "
+          f"{info['movements_replayed']} movements replayed {info['direction']})")
+    print(f"\n{'ID':<5} {'Product Name':<25} {'Stock':<8} {'Unit Price':<12} {'Value':<12}")
+    print("-" * 65)
+
+    total_value = 0
+    for product_id, name, quantity, unit_price in rows:
+        value = quantity * unit_price
+        total_value += value
+        print(f"{product_id:<5} {name[:24]:<25} {quantity:<8} ${unit_price:<11.2f} ${value:<11.2f}")
+
+    print("-" * 65)
+    print(f"Total Products: {len(rows)}")
+    print(f"Total Inventory Value: ${total_value:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="SmallBiz stock snapshots")
+    parser.add_argument('command', choices=['snapshot', 'snapshot-if-due'])
+    parser.add_argument('--store', type=int, help="store (outlet) to snapshot (default: the default store)")
+    args = parser.parse_args()
+    if args.store is not None and not set_current_store(args.store):
+        return 1
+
+    if args.command == 'snapshot':
+        snapshot_id = take_snapshot()
+    else:
+        snapshot_id = take_snapshot_if_due()
+        if snapshot_id is None:
+            print("No snapshot due.")
+            return 0
+
+    if snapshot_id is None:
+        print("Failed to take snapshot.")
+        return 1
+    print(f"Snapshot #{snapshot_id} taken for store {get_current_store()}.")
+    return 0
+
+# Take snapshots from the command line, e.g. from a nightly scheduled job
+if __name__ == "__main__":
+    raise SystemExit(main())
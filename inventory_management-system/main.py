@@ -2,20 +2,45 @@
 
 
 # Standard library imports for system operations
+import argparse
 import os
 import sys
 
 
 from products import add_product, view_products, update_product, delete_product
-from sales import record_sale, view_sales_history, sales_summary
-from database import initialize_database
+from sales import record_sale, view_sales_history, sales_summary, chain_sales_summary
+from export import export_data
+from checkout import rapid_checkout
+from backup import backup_menu
+from adjustments import bulk_adjustments
+from inventory import inventory_as_of, take_snapshot_if_due
+from database import DEFAULT_STORE_ID, initialize_database, set_current_store, get_current_store
 from utils import clear_screen, pause
+from profiler import PROFILE_REPORT_FILE, new_run_id, profile_action
+
+# Menu options mapped to the function that handles them
+MENU_ACTIONS = {
+    '1': add_product,
+    '2': view_products,
+    '3': update_product,
+    '4': delete_product,
+    '5': record_sale,
+    '6': view_sales_history,
+    '7': sales_summary,
+    '8': export_data,
+    '9': chain_sales_summary,
+    '10': inventory_as_of,
+    '11': rapid_checkout,
+    '12': backup_menu,
+    '13': bulk_adjustments
+}
 
 def display_menu():
     # Clears screen and displays the main menu with all available options
     clear_screen()
     print("="*60)
     print("           SMALLBIZ INVENTORY MANAGEMENT SYSTEM")
+    print(f"                        Store {get_current_store()}")
     print("="*60)
     print("1. Add Product")
     print("2. View All Products")
@@ -24,10 +49,31 @@ def display_menu():
     print("5. Record Sale")
     print("6. View Sales History")
     print("7. Sales Summary")
-    print("8. Exit")
+    print("8. Export Data")
+    print("9. Chain Summary (All Stores)")
+    print("10. Inventory As Of Date")
+    print("11. Rapid Checkout (Scanner)")
+    print("12. Backup & Restore")
+    print("13. Bulk Adjustments")
+    print("14. Exit")
     print("-"*60)
 
-def main():
+def parse_args(argv=None):
+    # Command line options for running the application
+    parser = argparse.ArgumentParser(description="SmallBiz Inventory Management System")
+    parser.add_argument('--store', type=int, default=DEFAULT_STORE_ID,
+                        help=f"store (outlet) to work on (default: {DEFAULT_STORE_ID})")
+    parser.add_argument('--profile', action='store_true',
+                        help="profile every menu action and log the results")
+    parser.add_argument('--profile-report', default=PROFILE_REPORT_FILE,
+                        help=f"file the profile results are appended to (default: {PROFILE_REPORT_FILE})")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not set_current_store(args.store):
+        return
+
     # Initialize database connection at startup
     print("Starting SmallBiz Inventory System...")
     if initialize_database():
@@ -35,28 +81,28 @@ def main():
     else:
         print("Failed to connect to database. Please check your MySQL connection.")
         return
+
+    # Keep the stock snapshots used by "Inventory As Of Date" fresh
+    if take_snapshot_if_due():
+        print("Stock snapshot taken.\n")
+
+    if args.profile:
+        run_id = new_run_id()
+        print(f"Profiling enabled (run {run_id}), results go to {args.profile_report}\n")
     
     # Main application loop - keeps program running until user exits
     while True:
         display_menu()
-        choice = input("Select an option (1-8): ").strip()
+        choice = input("Select an option (1-14): ").strip()
         
         # Process user menu selection and call appropriate function
-        if choice == '1':
-            add_product()
-        elif choice == '2':
-            view_products()
-        elif choice == '3':
-            update_product()
-        elif choice == '4':
-            delete_product()
-        elif choice == '5':
-            record_sale()
-        elif choice == '6':
-            view_sales_history()
-        elif choice == '7':
-            sales_summary()
-        elif choice == '8':
+        action = MENU_ACTIONS.get(choice)
+        if action:
+            if args.profile:
+                profile_action(action, run_id, args.profile_report)
+            else:
+                action()
+        elif choice == '14':
             # Exit the application gracefully
             print("\nThank you for using SmallBiz Inventory System!")
             print("Goodbye!")
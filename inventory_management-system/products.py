@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 
-from database import execute_query
+from database import execute_query, execute_transaction, get_current_store, get_product_by_id
+from checkout import forget_product
+from inventory import movement_statement
 from utils import clear_screen
 import mysql.connector
 
@@ -47,12 +49,17 @@ def add_product():
             except ValueError:
                 print("Invalid quantity format. Please enter a whole number.")
         
+        # Get optional SKU/barcode used by the checkout scanner
+        sku = input("SKU/Barcode (optional, press Enter to skip): ").strip() or None
+        
         # Display entered information for confirmation
         print("\n" + "-" * 40)
         print("PRODUCT INFORMATION SUMMARY:")
         print(f"Name: {name}")
         print(f"Price: ${price:.2f}")
         print(f"Quantity: {quantity}")
+        if sku:
+            print(f"SKU: {sku}")
         print("-" * 40)
         
         # Confirm before saving
@@ -61,16 +68,23 @@ def add_product():
         if confirm == 'y' or confirm == 'yes':
             # Insert product into database
             insert_query = """
-                INSERT INTO products (name, price, quantity) 
-                VALUES (%s, %s, %s)
+                INSERT INTO products (store_id, name, price, quantity, sku) 
+                VALUES (%s, %s, %s, %s, %s)
             """
+            statements = [(insert_query, (get_current_store(), name, price, quantity, sku))]
+            if quantity > 0:
+                # opening stock goes into the ledger as a restock of the new product
+                statements.append(("""
+                    INSERT INTO stock_movements (store_id, product_id, movement_type, quantity_change)
+                    VALUES (%s, LAST_INSERT_ID(), 'restock', %s)
+                """, (get_current_store(), quantity)))
             
-            result = execute_query(insert_query, (name, price, quantity))
+            result = execute_transaction(statements)
             
             if result is not None:
                 print("\nSUCCESS!")
                 print(f"Product '{name}' has been added to inventory successfully!")
-                print(f"Product ID: {result}")
+                print(f"Product ID: {result[0]}")
                 print(f"You can now sell this product or update its details anytime.")
             else:
                 print("\nFAILED!")
@@ -98,8 +112,8 @@ def view_products():
    print("="*60)
   
    try:
-       query = "SELECT id, name, price, quantity, created_date FROM products ORDER BY name"
-       products = execute_query(query)
+       query = "SELECT id, name, price, quantity, created_date FROM products WHERE store_id = %s ORDER BY name"
+       products = execute_query(query, (get_current_store(),))
       
        if products and len(products) > 0:
            print(f"{'ID':<5} {'Product Name':<25} {'Price':<10} {'Stock':<8} {'Date Added':<12}")
@@ -142,8 +156,8 @@ def update_product():
        print("Current products in inventory:")
        print("-" * 50)
       
-       query = "SELECT id, name, price, quantity FROM products ORDER BY name"
-       products = execute_query(query)
+       query = "SELECT id, name, price, quantity FROM products WHERE store_id = %s ORDER BY name"
+       products = execute_query(query, (get_current_store(),))
       
        if not products or len(products) == 0:
            print("No products found in inventory.")
@@ -182,9 +196,10 @@ def update_product():
        print("2. Product Price")
        print("3. Stock Quantity")
        print("4. All Details")
-       print("5. Cancel")
+       print("5. SKU/Barcode")
+       print("6. Cancel")
       
-       choice = input("Select option (1-5): ").strip()
+       choice = input("Select option (1-6): ").strip()
       
        if choice == '1':
            new_name = input(f"Enter new name (current: {current_name}): ").strip()
@@ -215,12 +230,12 @@ def update_product():
            try:
                new_quantity = int(input(f"Enter new quantity (current: {current_quantity}): ").strip())
                if new_quantity >= 0:
-                   update_query = "UPDATE products SET quantity = %s WHERE id = %s"
-                   result = execute_query(update_query, (new_quantity, product_id))
+                   result = execute_transaction(stock_adjustment_statements(
+                       product_id, current_quantity, new_quantity))
                    if result is not None:
                        print(f"Stock quantity updated to {new_quantity}")
                    else:
-                       print("Failed to update stock quantity")
+                       print("Failed to update stock quantity (it may have changed meanwhile)")
                else:
                    print("Quantity cannot be negative")
            except ValueError:
@@ -255,10 +270,12 @@ def update_product():
 
            update_query = """
                UPDATE products
-               SET name = %s, price = %s, quantity = %s
+               SET name = %s, price = %s
                WHERE id = %s
            """
-           result = execute_query(update_query, (new_name, new_price, new_quantity, product_id))
+           statements = [(update_query, (new_name, new_price, product_id))]
+           statements += stock_adjustment_statements(product_id, current_quantity, new_quantity)
+           result = execute_transaction(statements)
           
            if result is not None:
                print("All product details updated successfully!")
@@ -269,6 +286,15 @@ def update_product():
                print("Failed to update product details")
       
        elif choice == '5':
+           new_sku = input("Enter new SKU/barcode (leave empty to remove): ").strip() or None
+           update_query = "UPDATE products SET sku = %s WHERE id = %s"
+           result = execute_query(update_query, (new_sku, product_id))
+           if result is not None:
+               print(f"SKU updated to '{new_sku}'" if new_sku else "SKU removed")
+           else:
+               print("Failed to update SKU (it may already be used by another product)")
+      
+       elif choice == '6':
            print("Update cancelled")
       
        else:
@@ -288,8 +314,8 @@ def delete_product():
        print("Current products in inventory:")
        print("-" * 50)
       
-       query = "SELECT id, name, price, quantity FROM products ORDER BY name"
-       products = execute_query(query)
+       query = "SELECT id, name, price, quantity FROM products WHERE store_id = %s ORDER BY name"
+       products = execute_query(query, (get_current_store(),))
       
        if not products or len(products) == 0:
            print("No products found in inventory.")
@@ -329,10 +355,18 @@ def delete_product():
        confirm = input("Are you sure you want to delete this product? (type 'DELETE' to confirm): ").strip()
       
        if confirm == 'DELETE':
-           delete_query = "DELETE FROM products WHERE id = %s"
-           result = execute_query(delete_query, (product_id,))
+           result = execute_transaction([
+               # write the remaining stock off in the ledger before the product goes
+               ("""
+                   INSERT INTO stock_movements (store_id, product_id, movement_type, quantity_change)
+                   SELECT store_id, id, 'adjustment', -quantity FROM products
+                   WHERE id = %s AND quantity <> 0
+               """, (product_id,)),
+               ("DELETE FROM products WHERE id = %s", (product_id,))
+           ])
           
            if result is not None:
+               forget_product(product_id)
                print(f"\nSUCCESS!")
                print(f"Product '{current_name}' has been deleted from inventory.")
            else:
@@ -345,9 +379,13 @@ def delete_product():
    except Exception as e:
        print(f"Error deleting product: {e}")
 
-def get_product_by_id(product_id):
-   """Get single product by ID"""
-   query = "SELECT id, name, price, quantity FROM products WHERE id = %s"
-   result = execute_query(query, (product_id,))
-   return result[0] if result else None
-
+def stock_adjustment_statements(product_id, current_quantity, new_quantity):
+   """Statements that set a product's stock and record the change in the ledger"""
+   if new_quantity == current_quantity:
+       return []
+   return [
+       # only applies if nobody changed the stock since it was read
+       ("UPDATE products SET quantity = %s WHERE id = %s AND quantity = %s",
+        (new_quantity, product_id, current_quantity), True),
+       movement_statement(product_id, 'adjustment', new_quantity - current_quantity)
+   ]
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+import argparse
+import builtins
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from database import get_query_stats, reset_query_stats
+
+# results of every profiled action are appended here, one JSON object per line
+PROFILE_REPORT_FILE = 'profile_report.jsonl'
+
+# number of functions (by cumulative time) kept per profiled action
+PROFILE_TOP_FUNCTIONS = 15
+
+class _TimedStream:
+    """Wrap a text stream and add up the time spent writing to it"""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.elapsed = 0.0
+
+    def write(self, text):
+        started = time.perf_counter()
+        try:
+            return self._stream.write(text)
+        finally:
+            self.elapsed += time.perf_counter() - started
+
+    def flush(self):
+        started = time.perf_counter()
+        try:
+            return self._stream.flush()
+        finally:
+            self.elapsed += time.perf_counter() - started
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+def _top_functions(profiler, limit=PROFILE_TOP_FUNCTIONS):
+    """Return the most expensive functions of a profile, by cumulative time"""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+
+    top = []
+    for func in stats.fcn_list[:limit]:
+        filename, line, name = func
+        calls, _, total_time, cumulative_time, _ = stats.stats[func]
+        top.append({
+            'function': f"{filename}:{line}({name})",
+            'calls': calls,
+            'total_time': round(total_time, 6),
+            'cumulative_time': round(cumulative_time, 6)
+        })
+    return top
+
+def new_run_id():
+    """Return an identifier that groups the actions of one profiling session"""
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+def profile_action(action, run_id, report_path=PROFILE_REPORT_FILE):
+    """Run a menu action under CPU profiling and memory tracing and log the results"""
+    profiler = cProfile.Profile()
+    stdout = _TimedStream(sys.stdout)
+    input_time = 0.0
+    original_input = builtins.input
+
+    def timed_input(prompt=''):
+        # time spent waiting for the user is not the action's fault
+        nonlocal input_time
+        started = time.perf_counter()
+        try:
+            return original_input(prompt)
+        finally:
+            input_time += time.perf_counter() - started
+
+    reset_query_stats()
+    tracemalloc.start()
+    builtins.input = timed_input
+    sys.stdout = stdout
+    started = time.perf_counter()
+    try:
+        return profiler.runcall(action)
+    finally:
+        wall_time = time.perf_counter() - started
+        sys.stdout = stdout._stream
+        builtins.input = original_input
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        db_stats = get_query_stats()
+
+        record = {
+            'run_id': run_id,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'action': action.__name__,
+            'wall_time': round(wall_time, 6),
+            'input_wait_time': round(input_time, 6),
+            'active_time': round(wall_time - input_time, 6),
+            'db_time': round(db_stats['db_time'], 6),
+            'output_time': round(stdout.elapsed, 6),
+            'queries': db_stats['queries'],
+            'rows_fetched': db_stats['rows'],
+            'peak_memory_kb': round(peak_memory / 1024, 1),
+            'top_functions': _top_functions(profiler)
+        }
+        try:
+            with open(report_path, 'a', encoding='utf-8') as report:
+                report.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"Could not write profile report: {e}")
+
+        print(f"\n[profile] {record['action']}: {record['active_time']:.3f}s active, "
+              f"{record['db_time']:.3f}s DB, {record['queries']} queries, "
+              f"{record['rows_fetched']} rows, peak {record['peak_memory_kb']:.0f} KB")
+
+def summarize_report(report_path=PROFILE_REPORT_FILE):
+    """Print average timings per run and action from a profile report file"""
+    summary = OrderedDict()
+    try:
+        with open(report_path, encoding='utf-8') as report:
+            for line in report:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                key = (record['run_id'], record['action'])
+                totals = summary.setdefault(key, {'count': 0, 'active_time': 0.0,
+                                                  'db_time': 0.0, 'output_time': 0.0,
+                                                  'rows_fetched': 0, 'peak_memory_kb': 0.0})
+                totals['count'] += 1
+                totals['active_time'] += record['active_time']
+                totals['db_time'] += record['db_time']
+                totals['output_time'] += record['output_time']
+                totals['rows_fetched'] += record['rows_fetched']
+                totals['peak_memory_kb'] = max(totals['peak_memory_kb'], record['peak_memory_kb'])
+    except OSError as e:
+        print(f"Could not read profile report: {e}")
+        return
+
+    if not summary:
+        print("No profiled actions found.")
+        return
+
+    print(f"{'Run':<24} {'Action':<20} {'Calls':<6} {'Active':<9} {'DB':<9} {'Output':<9} {'Rows':<9} {'Peak KB':<9}")
+    print("-" * 100)
+    for (run_id, action), totals in summary.items():
+        count = totals['count']
+        print(f"{run_id:<24} {action:<20} {count:<6} "
+              f"{totals['active_time']/count:<9.3f} {totals['db_time']/count:<9.3f} "
+              f"{totals['output_time']/count:<9.3f} {totals['rows_fetched']//count:<9} "
+              f"{totals['peak_memory_kb']:<9.0f}")
+    print("\nTimes are averages per call in seconds; Peak KB is the highest seen.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare profiled runs of the SmallBiz menu actions")
+    parser.add_argument('report', nargs='?', default=PROFILE_REPORT_FILE)
+    args = parser.parse_args()
+    summarize_report(args.report)
+
+# Summarize a profile report from the command line
+if __name__ == "__main__":
+    main()
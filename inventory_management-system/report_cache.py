@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+import threading
+
+from database import execute_query, execute_queries_concurrently, get_current_store, ProductLoader
+
+# number of products and sales shown in the summary lists
+REPORT_TOP_N = 10
+
+# per-store report state, valid for the high-water mark stored with it
+_report_cache = {}
+_report_cache_lock = threading.Lock()
+
+def _high_water_mark(store_id):
+    """Return (max sales.id, product count, max products.id) of a store
+
+    MAX(id) is one lookup in idx_sales_store_id, and the product figures
+    only scan the store's catalog, so the cost of this check does not grow
+    with the sales history. Sales are only ever removed together with their
+    product, which changes the product figures.
+    """
+    query = """
+        SELECT (SELECT COALESCE(MAX(id), 0) FROM sales WHERE store_id = %s),
+               (SELECT COUNT(*) FROM products WHERE store_id = %s),
+               (SELECT COALESCE(MAX(id), 0) FROM products WHERE store_id = %s)
+    """
+    result = execute_query(query, (store_id, store_id, store_id))
+    return tuple(result[0]) if result else None
+
+def _sales_count(store_id):
+    """Return the number of sales of a store"""
+    result = execute_query("SELECT COUNT(*) FROM sales WHERE store_id = %s", (store_id,))
+    return result[0][0] if result else None
+
+def _aggregate_sales(store_id, after_id, up_to_id):
+    """Aggregate the sales of a store with after_id < id <= up_to_id"""
+    params = (store_id, after_id, up_to_id)
+    results = execute_queries_concurrently({
+        'totals': ("""
+            SELECT COUNT(*), COALESCE(SUM(total_amount), 0)
+            FROM sales
+            WHERE store_id = %s AND id > %s AND id <= %s
+        """, params),
+        'products': ("""
+            SELECT product_id, SUM(quantity_sold), SUM(total_amount)
+            FROM sales
+            WHERE store_id = %s AND id > %s AND id <= %s
+            GROUP BY product_id
+        """, params),
+        'recent_sales': (f"""
+            SELECT product_id, quantity_sold, total_amount, DATE(sale_date), sale_date, id
+            FROM sales
+            WHERE store_id = %s AND id > %s AND id <= %s
+            ORDER BY sale_date DESC, id DESC
+            LIMIT {REPORT_TOP_N}
+        """, params)
+    })
+    if any(result is None for result in results.values()):
+        return None
+
+    transactions, revenue = results['totals'][0]
+    return {
+        'transactions': transactions,
+        'revenue': revenue,
+        'products': {product_id: [qty_sold, product_revenue]
+                     for product_id, qty_sold, product_revenue in results['products']},
+        'recent_sales': list(results['recent_sales'])
+    }
+
+def _fold(cached, new_rows):
+    """Merge the aggregates of newly added sales into a cached report"""
+    cached['transactions'] += new_rows['transactions']
+    cached['revenue'] += new_rows['revenue']
+    for product_id, (qty_sold, revenue) in new_rows['products'].items():
+        totals = cached['products'].setdefault(product_id, [0, 0])
+        totals[0] += qty_sold
+        totals[1] += revenue
+    recent_sales = cached['recent_sales'] + new_rows['recent_sales']
+    recent_sales.sort(key=lambda sale: (sale[4], sale[5]), reverse=True)
+    cached['recent_sales'] = recent_sales[:REPORT_TOP_N]
+
+def get_sales_report(store_id=None):
+    """Return totals, top products and recent sales of a store"""
+    return _cached_report(store_id, _report_view)
+
+def get_sales_totals(store_id=None):
+    """Return only the transaction count and revenue of a store (no name lookups)"""
+    return _cached_report(store_id, _totals_view)
+
+def _cached_report(store_id, shape):
+    """Return shape(report) of a store's sales report, recomputing only what changed
+
+    A cached report is served after one high-water-mark query when no sale
+    was added and no product removed since. Otherwise the sales are counted:
+    new sales (higher IDs) are aggregated on their own and folded in if they
+    account for every added row; anything else, such as sales removed with
+    their product, triggers a full recompute. A sale that commits after one
+    with a higher ID is picked up by the recompute after the next sale.
+    """
+    if store_id is None:
+        store_id = get_current_store()
+
+    mark = _high_water_mark(store_id)
+    if mark is None:
+        return None
+    max_id = mark[0]
+
+    with _report_cache_lock:
+        cached = _report_cache.get(store_id)
+
+        if cached and cached['mark'] == mark:
+            return shape(cached, store_id)
+
+        row_count = _sales_count(store_id)
+        if row_count is None:
+            return None
+
+        if cached and max_id > cached['mark'][0] and row_count > cached['rows']:
+            new_rows = _aggregate_sales(store_id, cached['mark'][0], max_id)
+            # the fold is only valid if it accounts for every added row
+            if new_rows and cached['rows'] + new_rows['transactions'] == row_count:
+                _fold(cached, new_rows)
+                cached['mark'] = mark
+                cached['rows'] = row_count
+                return shape(cached, store_id)
+
+        report = _aggregate_sales(store_id, 0, max_id)
+        if report is None or report['transactions'] != row_count:
+            # sales changed while aggregating; serve it but do not cache it
+            _report_cache.pop(store_id, None)
+            return shape(report, store_id) if report else None
+        report['mark'] = mark
+        report['rows'] = row_count
+        _report_cache[store_id] = report
+        return shape(report, store_id)
+
+def _report_view(report, store_id):
+    """Shape cached report state for display, with current product names
+
+    Reports are kept by product_id; names are looked up on every view, so
+    renamed products show their new name.
+    """
+    top_products = sorted(report['products'].items(), key=lambda item: item[1][0], reverse=True)
+    top_products = top_products[:REPORT_TOP_N]
+
+    # both lists are resolved together: the first get() fetches every
+    # requested product in one batched query
+    loader = ProductLoader(store_id)
+    loader.request(*[product_id for product_id, _ in top_products if product_id is not None])
+    loader.request(*[sale[0] for sale in report['recent_sales'] if sale[0] is not None])
+
+    def product_name(product_id):
+        if product_id is None:
+            return "(unknown product)"
+        product = loader.get(product_id)
+        return product[1] if product else f"(unknown product #{product_id})"
+
+    return {
+        'transactions': report['transactions'],
+        'revenue': report['revenue'],
+        'top_products': [(product_name(product_id), qty_sold, revenue)
+                         for product_id, (qty_sold, revenue) in top_products],
+        'recent_sales': [(product_name(sale[0]),) + tuple(sale[1:4])
+                         for sale in report['recent_sales']]
+    }
+
+def _totals_view(report, store_id):
+    return {'transactions': report['transactions'], 'revenue': report['revenue']}
+
+def clear_report_cache():
+    """Forget all cached reports"""
+    with _report_cache_lock:
+        _report_cache.clear()
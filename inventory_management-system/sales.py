@@ -1,16 +1,35 @@
 #!/usr/bin/env python3
 
-from database import execute_query, get_product_by_id
+from database import (execute_query, execute_on_all_stores, execute_transaction,
+                      get_current_store, get_product_by_id)
+from report_cache import get_sales_report, get_sales_totals
 from utils import clear_screen
 
+def commit_sale(product_id, quantity, unit_price):
+    """Record a sale, its stock decrease and ledger entry atomically; return the sale ID"""
+    result = execute_transaction([
+        # guarded decrement: fails instead of overselling if stock ran out meanwhile
+        ("UPDATE products SET quantity = quantity - %s WHERE id = %s AND quantity >= %s",
+         (quantity, product_id, quantity), True),
+        ("""
+            INSERT INTO sales (store_id, product_id, quantity_sold, sale_price)
+            VALUES (%s, %s, %s, %s)
+        """, (get_current_store(), product_id, quantity, unit_price)),
+        ("""
+            INSERT INTO stock_movements (store_id, product_id, movement_type, quantity_change, sale_id)
+            VALUES (%s, %s, 'sale', %s, LAST_INSERT_ID())
+        """, (get_current_store(), product_id, -quantity))
+    ])
+    return result[1] if result else None
+
 def record_sale():
     clear_screen()
     print("="*60)
     print("                    RECORD SALE")
     print("="*60)
     
-    query = "SELECT id, name, price, quantity FROM products WHERE quantity > 0 ORDER BY name"
-    available_products = execute_query(query)
+    query = "SELECT id, name, price, quantity FROM products WHERE store_id = %s AND quantity > 0 ORDER BY name"
+    available_products = execute_query(query, (get_current_store(),))
     
     if not available_products:
         print("No products available for sale.")
@@ -67,28 +86,16 @@ def record_sale():
         confirm = input("Confirm this sale? (y/N): ").lower().strip()
         
         if confirm == 'y':
-            insert_sale_query = """
-                INSERT INTO sales (product_id, product_name, quantity_sold, sale_price, total_amount)
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            
-            sale_result = execute_query(insert_sale_query, 
-                (product_id, product_name, quantity_to_sell, product_price, total_amount))
+            sale_result = commit_sale(product_id, quantity_to_sell, product_price)
             
             if sale_result:
                 new_stock = current_stock - quantity_to_sell
-                update_stock_query = "UPDATE products SET quantity = %s WHERE id = %s"
-                stock_result = execute_query(update_stock_query, (new_stock, product_id))
-                
-                if stock_result is not None:
-                    print("\nSALE RECORDED SUCCESSFULLY!")
-                    print(f"Sale ID: {sale_result}")
-                    print(f"Remaining Stock: {new_stock}")
-                    print(f"Revenue Generated: ${total_amount:.2f}")
-                else:
-                    print("\nWarning: Sale recorded but stock update failed.")
+                print("\nSALE RECORDED SUCCESSFULLY!")
+                print(f"Sale ID: {sale_result}")
+                print(f"Remaining Stock: {new_stock}")
+                print(f"Revenue Generated: ${total_amount:.2f}")
             else:
-                print("\nFailed to record sale. Please try again.")
+                print("\nFailed to record sale. The stock may have changed; please try again.")
         else:
             print("\nSale cancelled.")
     
@@ -104,13 +111,15 @@ def view_sales_history():
     print("="*60)
     
     query = """
-        SELECT id, product_name, quantity_sold, sale_price, total_amount, 
-               DATE(sale_date) as sale_date
-        FROM sales 
-        ORDER BY sale_date DESC, id DESC
+        SELECT s.id, COALESCE(p.name, '(unknown product)'), s.quantity_sold, s.sale_price, s.total_amount, 
+               DATE(s.sale_date) as sale_date
+        FROM sales s
+        LEFT JOIN products p ON p.id = s.product_id
+        WHERE s.store_id = %s
+        ORDER BY s.sale_date DESC, s.id DESC
     """
     
-    sales = execute_query(query)
+    sales = execute_query(query, (get_current_store(),))
     
     if not sales:
         print("No sales records found.")
@@ -119,14 +128,15 @@ def view_sales_history():
     print(f"{'ID':<5} {'Product':<20} {'Qty':<5} {'Price':<8} {'Total':<10} {'Date':<12}")
     print("-" * 70)
     
-    total_revenue = 0
     for sale_id, product_name, qty_sold, sale_price, total_amount, sale_date in sales:
         print(f"{sale_id:<5} {product_name:<20} {qty_sold:<5} ${sale_price:<7.2f} ${total_amount:<9.2f} {sale_date}")
-        total_revenue += total_amount
     
+    # totals come from the report cache instead of being summed again
+    totals = get_sales_totals()
     print("-" * 70)
-    print(f"Total Sales Records: {len(sales)}")
-    print(f"Total Revenue: ${total_revenue:.2f}")
+    if totals:
+        print(f"Total Sales Records: {totals['transactions']}")
+        print(f"Total Revenue: ${totals['revenue']:.2f}")
 
 def sales_summary():
     clear_screen()
@@ -134,14 +144,13 @@ def sales_summary():
     print("                   SALES SUMMARY")
     print("="*60)
     
-    total_sales_query = "SELECT COUNT(*), SUM(total_amount) FROM sales"
-    total_result = execute_query(total_sales_query)
+    report = get_sales_report()
     
-    if not total_result or not total_result[0][0]:
+    if not report or not report['transactions']:
         print("No sales data available.")
         return
     
-    total_transactions, total_revenue = total_result[0]
+    total_transactions, total_revenue = report['transactions'], report['revenue']
     
     print(f"Total Transactions: {total_transactions}")
     print(f"Total Revenue: ${total_revenue:.2f}")
@@ -151,16 +160,7 @@ def sales_summary():
     print("TOP SELLING PRODUCTS")
     print("="*40)
     
-    top_products_query = """
-        SELECT product_name, SUM(quantity_sold) as total_sold, 
-               SUM(total_amount) as revenue
-        FROM sales 
-        GROUP BY product_name 
-        ORDER BY total_sold DESC
-        LIMIT 10
-    """
-    
-    top_products = execute_query(top_products_query)
+    top_products = report['top_products']
     
     if top_products:
         print(f"{'Product':<25} {'Qty Sold':<10} {'Revenue':<12}")
@@ -172,14 +172,7 @@ def sales_summary():
     print("RECENT SALES (Last 10)")
     print("="*40)
     
-    recent_sales_query = """
-        SELECT product_name, quantity_sold, total_amount, DATE(sale_date)
-        FROM sales 
-        ORDER BY sale_date DESC, id DESC
-        LIMIT 10
-    """
-    
-    recent_sales = execute_query(recent_sales_query)
+    recent_sales = report['recent_sales']
     
     if recent_sales:
         print(f"{'Product':<20} {'Qty':<5} {'Amount':<10} {'Date':<12}")
@@ -187,4 +180,104 @@ def sales_summary():
         for product_name, qty_sold, amount, sale_date in recent_sales:
             print(f"{product_name:<20} {qty_sold:<5} ${amount:<9.2f} {sale_date}")
     
+    print("\n" + "="*60)
+
+def chain_sales_summary():
+    """Sales summary across all stores, merged from every shard"""
+    clear_screen()
+    print("="*60)
+    print("              CHAIN SALES SUMMARY (ALL STORES)")
+    print("="*60)
+    
+    # each shard returns partial aggregates for its own stores; they are
+    # merged here, so top products cannot be cut off with LIMIT per shard
+    results = execute_on_all_stores({
+        'totals': ("""
+            SELECT store_id, COUNT(*), SUM(total_amount)
+            FROM sales 
+            WHERE store_id IN ({stores})
+            GROUP BY store_id
+        """, None),
+        # aggregated by product_id first; only the grouped rows are joined
+        # to products for their current names
+        'products': ("""
+            SELECT p.name, t.qty_sold, t.revenue
+            FROM (
+                SELECT product_id, SUM(quantity_sold) AS qty_sold, SUM(total_amount) AS revenue
+                FROM sales 
+                WHERE store_id IN ({stores})
+                GROUP BY product_id
+            ) t
+            JOIN products p ON p.id = t.product_id
+        """, None),
+        'recent_sales': ("""
+            SELECT s.store_id, COALESCE(p.name, '(unknown product)'), s.quantity_sold, s.total_amount, s.sale_date, s.id
+            FROM sales s
+            LEFT JOIN products p ON p.id = s.product_id
+            WHERE s.store_id IN ({stores})
+            ORDER BY s.sale_date DESC, s.id DESC
+            LIMIT 10
+        """, None)
+    })
+    
+    failed_shards = sorted({shard for shard_results in results.values()
+                            for shard, rows in shard_results.items() if rows is None})
+    
+    store_totals = []
+    for rows in results['totals'].values():
+        store_totals.extend(rows or [])
+    
+    if not store_totals:
+        print("No sales data available.")
+        return
+    
+    total_transactions = sum(count for _, count, _ in store_totals)
+    total_revenue = sum(revenue for _, _, revenue in store_totals)
+    
+    print(f"Total Transactions: {total_transactions}")
+    print(f"Total Revenue: ${total_revenue:.2f}")
+    print(f"Average Sale Value: ${total_revenue/total_transactions:.2f}")
+    
+    print("\n" + "="*40)
+    print("REVENUE BY STORE")
+    print("="*40)
+    print(f"{'Store':<8} {'Transactions':<14} {'Revenue':<12}")
+    print("-" * 40)
+    for store_id, count, revenue in sorted(store_totals):
+        print(f"{store_id:<8} {count:<14} ${revenue:<11.2f}")
+    
+    print("\n" + "="*40)
+    print("TOP SELLING PRODUCTS")
+    print("="*40)
+    
+    product_totals = {}
+    for rows in results['products'].values():
+        for product_name, qty_sold, revenue in rows or []:
+            totals = product_totals.setdefault(product_name, [0, 0])
+            totals[0] += qty_sold
+            totals[1] += revenue
+    top_products = sorted(product_totals.items(), key=lambda item: item[1][0], reverse=True)[:10]
+    
+    print(f"{'Product':<25} {'Qty Sold':<10} {'Revenue':<12}")
+    print("-" * 50)
+    for product_name, (qty_sold, revenue) in top_products:
+        print(f"{product_name:<25} {qty_sold:<10} ${revenue:<11.2f}")
+    
+    print("\n" + "="*40)
+    print("RECENT SALES (Last 10)")
+    print("="*40)
+    
+    recent_sales = []
+    for rows in results['recent_sales'].values():
+        recent_sales.extend(rows or [])
+    recent_sales.sort(key=lambda sale: (sale[4], sale[5]), reverse=True)
+    
+    print(f"{'Store':<7} {'Product':<20} {'Qty':<5} {'Amount':<10} {'Date':<12}")
+    print("-" * 57)
+    for store_id, product_name, qty_sold, amount, sale_date, _ in recent_sales[:10]:
+        print(f"{store_id:<7} {product_name:<20} {qty_sold:<5} ${amount:<9.2f} {sale_date:%Y-%m-%d}")
+    
+    if failed_shards:
+        print(f"\nWarning: no data from shard(s) {', '.join(failed_shards)}; figures are partial.")
+    
     print("\n" + "="*60)
\ No newline at end of file